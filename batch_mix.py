@@ -0,0 +1,6 @@
+# batch_mix.py
+import sys
+from processing.batch import main
+
+if __name__ == "__main__":
+    sys.exit(main())
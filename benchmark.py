@@ -0,0 +1,6 @@
+# benchmark.py
+import sys
+from processing.benchmark import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# gui/component_cache.py
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import cv2
+import numpy as np
+from gui.image_pyramid import ImagePyramid
+from processing.out_of_core import OutOfCoreMixer
+from processing.instrumentation import instrumentation
+
+
+class ComponentRenderCache:
+    """Display-ready Fourier component renderings, keyed by image identity and component.
+
+    Each rendering is the normalized uint8 buffer wrapped in an ImagePyramid,
+    whose fit cache covers the view-size part of the key. warm() renders all
+    four components of a freshly loaded image on a background thread, so
+    switching components is only a pixmap swap. Images whose spectrum would
+    not fit in ram_limit bytes are not rendered.
+    """
+    COMPONENTS = ("FT Magnitude", "FT Phase", "FT Real", "FT Imaginary")
+
+    def __init__(self, fourier, max_images=8, ram_limit=None):
+        self.fourier = fourier
+        self.max_images = max_images
+        self.ram_limit = ram_limit
+        self._entries = OrderedDict()  # id(image) -> (image, {component: Future of its ImagePyramid})
+        self._lock = threading.Lock()  # Guards _entries only; rendering happens outside it
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="component-warmup")
+
+    def render(self, fft_shift, component):
+        """Normalize one component of a shifted spectrum to a uint8 display buffer."""
+        if component not in self.COMPONENTS:
+            raise ValueError(f"Invalid component selected: {component}")
+        with instrumentation.span("extraction", component=component):
+            # Only the requested plane is computed from the lazy component view
+            values = self.fourier.extract_components(fft_shift)[component[len("FT "):]]
+            if component == "FT Magnitude":
+                values = np.log(values + 1)  # Log scale for better visualization
+            # Normalize component to displayable range (0-255)
+            return cv2.normalize(values, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+    def fits(self, image):
+        """True unless rendering image in memory would need more than ram_limit bytes."""
+        shape = self.fourier.working_shape(image.shape)
+        return not self.ram_limit or OutOfCoreMixer.in_memory_bytes(1, shape, self.fourier.complex_dtype) <= self.ram_limit
+
+    def get(self, image, component, view_size=None):
+        """Return the ImagePyramid of one component, rendering it on a miss.
+
+        view_size, a (width, height) pair, pre-fits the rendering for that view.
+        A rendering already in progress on another thread is waited for, not
+        computed twice.
+        """
+        if not self.fits(image):
+            raise ValueError(f"Image of shape {image.shape} is too large to render within the RAM limit.")
+        with self._lock:
+            entry = self._entries.get(id(image))
+            # The stored reference keeps the id from being reused while the entry lives
+            if entry is None or entry[0] is not image:
+                entry = (image, {})
+                self._entries[id(image)] = entry
+                while len(self._entries) > self.max_images:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(id(image))
+            renderings = entry[1]
+            future = renderings.get(component)
+            owner = future is None
+            if owner:
+                future = renderings[component] = Future()
+        if owner:
+            try:
+                fft_shift = self.fourier.get_spectrum(image)
+                future.set_result(ImagePyramid(self.render(fft_shift, component)))
+            except Exception as e:
+                with self._lock:
+                    if renderings.get(component) is future:
+                        del renderings[component]  # Let a later call retry
+                future.set_exception(e)
+        pyramid = future.result()
+        if view_size is not None:
+            pyramid.fit(*view_size)
+        return pyramid
+
+    def warm(self, image, view_size=None):
+        """Render every component of image in the background, unless it is too large to render."""
+        if not self.fits(image):
+            return None
+        return self._executor.submit(self._warm, image, view_size)
+
+    def _warm(self, image, view_size):
+        try:
+            for component in self.COMPONENTS:
+                self.get(image, component, view_size)
+        except Exception as e:
+            print(f"Error warming component renderings: {e}")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
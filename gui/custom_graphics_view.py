@@ -2,8 +2,10 @@
 import numpy as np
 import cv2
 from PyQt5.QtWidgets import QGraphicsView, QGraphicsPixmapItem, QGraphicsRectItem, QGraphicsScene
-from PyQt5.QtGui import QImage, QPixmap, QColor, QPen, QMouseEvent
-from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtGui import QImage, QPixmap, QColor, QPen, QMouseEvent, QGuiApplication
+from PyQt5.QtCore import Qt, QRectF, QTimer
+from gui.image_pyramid import ImagePyramid
+from processing.instrumentation import instrumentation
 
 class CustomGraphicsView(QGraphicsView):
     def __init__(self, *args, **kwargs):
@@ -15,20 +17,107 @@ class CustomGraphicsView(QGraphicsView):
         self.region_rect_item = None
         self.inner_region_selected = True
         self.region_size = 50  # Default size percentage
-
-    def set_image(self, pixmap: QPixmap):
-        """Set the image in the scene and assign it to image_item."""
+        self.last_mouse_position = None
+        self.source_image = None  # Unadjusted grayscale ndarray behind the displayed pixmap
+        self.pyramid = None  # Mip-map pyramid of the full-resolution image set through set_source
+        # Coalesce brightness/contrast drags to one update per display refresh
+        self.adjust_timer = QTimer(self)
+        self.adjust_timer.setSingleShot(True)
+        self.adjust_timer.setInterval(self.refresh_interval_ms())
+        self.adjust_timer.timeout.connect(self.adjust_brightness_contrast)
+
+    @staticmethod
+    def refresh_interval_ms():
+        """Frame interval of the primary screen, falling back to 60 Hz."""
+        screen = QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen else 0
+        return max(1, int(1000 / (refresh_rate if refresh_rate > 0 else 60)))
+
+    @staticmethod
+    def pixmap_to_array(pixmap: QPixmap):
+        """Convert a pixmap to a grayscale uint8 ndarray (copied, so it outlives the pixmap)."""
+        image = pixmap.toImage().convertToFormat(QImage.Format_Grayscale8)
+        width, height = image.width(), image.height()
+        buffer = image.bits()
+        buffer.setsize(image.byteCount())
+        rows = np.frombuffer(buffer, dtype=np.uint8).reshape((height, image.bytesPerLine()))
+        return rows[:, :width].copy()
+
+    @staticmethod
+    def brightness_contrast_lut(brightness, contrast):
+        """256-entry table equal to cv2.convertScaleAbs(x, alpha=contrast, beta=brightness).
+
+        cv2 computes x * alpha + beta as one float32 fused multiply-add; the
+        float64 result of float32 operands, rounded once to float32, is the same.
+        """
+        values = np.arange(256, dtype=np.float64) * np.float32(contrast) + np.float32(brightness)
+        return np.clip(np.rint(np.abs(values.astype(np.float32))), 0, 255).astype(np.uint8)
+
+    def set_image(self, pixmap: QPixmap, source=None):
+        """Set the image in the scene and assign it to image_item.
+
+        source is the grayscale ndarray the pixmap shows; brightness and contrast
+        are always applied to it, never to the already adjusted pixmap.
+        """
         if not pixmap or pixmap.isNull():
             print("Invalid pixmap provided.")
             return
 
         # Clear the scene and add the new pixmap
         self.scene().clear()
+        self.region_rect_item = None
         self.image_item = QGraphicsPixmapItem(pixmap)
         self.scene().addItem(self.image_item)
-        print("Image set successfully in the scene.")
+        self.source_image = np.ascontiguousarray(source) if source is not None else self.pixmap_to_array(pixmap)
+        if self.brightness != 0 or self.contrast != 1.0:
+            self.adjust_brightness_contrast()
+        instrumentation.event("set_image", width=pixmap.width(), height=pixmap.height())
         
 
+    def set_source(self, image, pyramid=None):
+        """Display a full-resolution grayscale ndarray scaled to fit the view.
+
+        The pyramid is rebuilt only when a different array is set (or a prebuilt
+        pyramid of it is passed in); resizes and zooms pick the nearest pyramid
+        level instead of rescaling the source.
+        """
+        if image is None or image.size == 0:
+            print("No image to display.")
+            return
+        if pyramid is not None:
+            self.pyramid = pyramid
+        elif self.pyramid is None or self.pyramid.source is not image:
+            self.pyramid = ImagePyramid(image)
+        self.render_source()
+
+    def render_source(self):
+        """Render the pyramid level matching the current view size and zoom."""
+        if self.pyramid is None:
+            return
+        zoom = self.transform().m11() or 1.0
+        size = self.size()
+        with instrumentation.span("scale"):
+            fitted = self.pyramid.fit(size.width() * zoom, size.height() * zoom)
+        height, width = fitted.shape
+        with instrumentation.span("qimage", width=width, height=height):
+            pixmap = QPixmap.fromImage(QImage(fitted.data, width, height, fitted.strides[0], QImage.Format_Grayscale8))
+        had_region = self.region_rect_item is not None
+        self.set_image(pixmap, source=fitted)
+        # Keep scene geometry at the unzoomed fit size so region overlays stay aligned
+        self.image_item.setScale(1.0 / zoom)
+        if had_region:
+            self.draw_region()
+
+    def set_zoom(self, factor):
+        """Zoom the view and re-render from the matching pyramid level."""
+        self.resetTransform()
+        self.scale(factor, factor)
+        self.render_source()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.render_source()
+
     def draw_region(self):
         """Draw the region rectangle based on the current settings."""
         if not self.image_item:
@@ -37,7 +126,7 @@ class CustomGraphicsView(QGraphicsView):
         if self.region_rect_item:
             self.scene().removeItem(self.region_rect_item)
 
-        scene_rect = self.image_item.boundingRect()
+        scene_rect = self.image_item.sceneBoundingRect()
         width = scene_rect.width()
         height = scene_rect.height()
 
@@ -58,52 +147,25 @@ class CustomGraphicsView(QGraphicsView):
         self.scene().addItem(self.region_rect_item)
 
     def adjust_brightness_contrast(self):
-        """Adjust brightness and contrast of the image."""
-        if not self.image_item:
+        """Adjust brightness and contrast of the image through a lookup table on the source array."""
+        if not self.image_item or self.source_image is None:
             print("No image item found in the scene.")
             return
 
-        pixmap = self.image_item.pixmap()
-        if pixmap.isNull():
-            print("Pixmap is invalid.")
-            return
-
-        # Convert QPixmap to QImage
-        image = pixmap.toImage()
-        if image.isNull():
-            print("QImage is invalid.")
-            return
-
         try:
-            # Convert QImage to numpy array
-            width, height = image.width(), image.height()
-            image = image.convertToFormat(QImage.Format_Grayscale8)
-            buffer = image.bits()
-            buffer.setsize(image.byteCount())
-            array = np.frombuffer(buffer, dtype=np.uint8).reshape((height, width))
-
-            print(f"Image array shape: {array.shape}, dtype: {array.dtype}")
-
             # Validate brightness and contrast
-            if not hasattr(self, "brightness") or not hasattr(self, "contrast"):
-                self.brightness = 0
-                self.contrast = 1.0
-                print("Brightness and contrast set to defaults.")
-
             if not isinstance(self.brightness, (int, float)) or not isinstance(self.contrast, (int, float)):
                 print("Brightness and contrast must be numeric values.")
                 return
 
-            # Apply brightness and contrast adjustments
-            adjusted = cv2.convertScaleAbs(array, alpha=self.contrast, beta=self.brightness)
-
-            if adjusted is None or adjusted.size == 0:
-                print("Adjustment failed, resulting data is invalid.")
-                return
-
-            # Convert adjusted numpy array back to QPixmap
-            adjusted_image = QImage(adjusted.data, adjusted.shape[1], adjusted.shape[0], QImage.Format_Grayscale8)
-            self.image_item.setPixmap(QPixmap.fromImage(adjusted_image))
+            with instrumentation.span("brightness_contrast"):
+                lut = self.brightness_contrast_lut(self.brightness, self.contrast)
+                adjusted = cv2.LUT(self.source_image, lut)
+            height, width = adjusted.shape
+            with instrumentation.span("qimage", width=width, height=height):
+                adjusted_image = QImage(adjusted.data, width, height, adjusted.strides[0], QImage.Format_Grayscale8)
+                # fromImage copies the pixels, so the temporary array may be released afterwards
+                self.image_item.setPixmap(QPixmap.fromImage(adjusted_image))
         except Exception as e:
             print(f"Error adjusting brightness/contrast: {e}")
 
@@ -111,19 +173,19 @@ class CustomGraphicsView(QGraphicsView):
         """Update the size of the region rectangle."""
         self.region_size = size
         self.draw_region()
-        print(f"Updated region size: {size}%")
+        instrumentation.event("region_size", size=size)
 
     def select_inner_region(self):
         """Select the inner region."""
         self.inner_region_selected = True
         self.draw_region()
-        print("Inner region selected.")
+        instrumentation.event("region_type", region="inner")
 
     def select_outer_region(self):
         """Select the outer region."""
         self.inner_region_selected = False
         self.draw_region()
-        print("Outer region selected.")
+        instrumentation.event("region_type", region="outer")
 
 
 
@@ -141,10 +203,11 @@ class CustomGraphicsView(QGraphicsView):
                 self.contrast = max(0.1, min(3.0, self.contrast + dx / 100.0))
                 self.brightness = max(-100, min(100, self.brightness + dy / 2.0))
 
-                print(f"Brightness: {self.brightness}, Contrast: {self.contrast}")
+                instrumentation.event("brightness_contrast_drag", brightness=self.brightness, contrast=self.contrast)
 
-                # Apply the adjustments
-                self.adjust_brightness_contrast()
+                # Apply the adjustments at most once per display refresh
+                if not self.adjust_timer.isActive():
+                    self.adjust_timer.start()
                 self.last_mouse_position = event.pos()
             except Exception as e:
                 print(f"Error in brightness/contrast update: {e}")
@@ -153,4 +216,8 @@ class CustomGraphicsView(QGraphicsView):
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         if event.button() == Qt.LeftButton:
-            self.last_mouse_position = None
\ No newline at end of file
+            self.last_mouse_position = None
+            # Flush a pending update so the final drag position is always shown
+            if self.adjust_timer.isActive():
+                self.adjust_timer.stop()
+                self.adjust_brightness_contrast()
\ No newline at end of file
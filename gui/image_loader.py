@@ -0,0 +1,20 @@
+# gui/image_loader.py
+from PyQt5.QtCore import QThread, pyqtSignal
+from processing.ingest import IngestPipeline
+
+
+class ImageLoader(QThread):
+    """Decode an image file off the GUI thread."""
+    loaded = pyqtSignal(int, object)  # input index, grayscale ndarray
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, path, input_index):
+        super().__init__()
+        self.path = path
+        self.input_index = input_index
+
+    def run(self):
+        try:
+            self.loaded.emit(self.input_index, IngestPipeline.decode(self.path))
+        except Exception as e:
+            self.failed.emit(self.input_index, str(e))
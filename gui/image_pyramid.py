@@ -0,0 +1,62 @@
+# gui/image_pyramid.py
+import threading
+import cv2
+import numpy as np
+
+
+class ImagePyramid:
+    """Lazily built mip-map pyramid of a grayscale image for viewport display.
+
+    Level 0 is the source; every further level halves both sides with area
+    averaging. Levels are only built when a smaller display asks for them, and
+    the last few fitted renderings are kept so redraws at an unchanged size
+    cost nothing. Pyramids are shared between the GUI thread and the
+    component warm-up thread, so building levels and fits is serialized.
+    """
+
+    def __init__(self, source, max_fits=4):
+        self.source = source
+        self.levels = [np.ascontiguousarray(source)]
+        self.max_fits = max_fits
+        self._fits = {}
+        self._lock = threading.RLock()
+
+    def level(self, index):
+        """Return pyramid level index, building any missing levels on the way."""
+        with self._lock:
+            while len(self.levels) <= index:
+                previous = self.levels[-1]
+                h, w = previous.shape[:2]
+                if h < 2 or w < 2:
+                    return previous
+                self.levels.append(cv2.resize(previous, ((w + 1) // 2, (h + 1) // 2), interpolation=cv2.INTER_AREA))
+            return self.levels[index]
+
+    def level_for(self, width, height):
+        """Return the smallest level that is still at least width x height."""
+        index = 0
+        h, w = self.source.shape[:2]
+        while (w + 1) // 2 >= width and (h + 1) // 2 >= height and w > 1 and h > 1:
+            h, w = (h + 1) // 2, (w + 1) // 2
+            index += 1
+        return self.level(index)
+
+    def fit(self, width, height):
+        """Return the image scaled to fit width x height, keeping the aspect ratio."""
+        h, w = self.source.shape[:2]
+        scale = min(width / w, height / h)
+        target = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+        with self._lock:
+            fitted = self._fits.get(target)
+            if fitted is None:
+                level = self.level_for(*target)
+                if level.shape[1] == target[0] and level.shape[0] == target[1]:
+                    fitted = level
+                else:
+                    # One short resize from the nearest larger level (or an upscale of the source)
+                    interpolation = cv2.INTER_AREA if level.shape[1] > target[0] else cv2.INTER_LINEAR
+                    fitted = cv2.resize(level, target, interpolation=interpolation)
+                if len(self._fits) >= self.max_fits:
+                    self._fits.pop(next(iter(self._fits)))
+                self._fits[target] = fitted
+            return fitted
@@ -1,32 +1,79 @@
 # gui/main_window.py
-import numpy as np
-import cv2
+import os
 from PyQt5.QtWidgets import (
     QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
     QLabel, QPushButton, QComboBox, QFileDialog, QRadioButton,
-    QGraphicsScene, QProgressBar, QGroupBox, QMessageBox, QSlider, QGraphicsView
+    QGraphicsScene, QProgressBar, QGroupBox, QMessageBox, QSlider, QGraphicsView, QShortcut
 )
-from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtCore import Qt
-from processing.image_processor import ImageProcessor
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import Qt, pyqtSignal
+from processing.mixing_worker import MixingWorker
+from processing.mixing_core import parse_resize_policy
+from processing.out_of_core import parse_size
+from processing.FourierBase import FourierBase
+from processing.live_mixer import LiveMixer
+from processing.region_sweep import RegionSweep
+from processing.instrumentation import instrumentation
 from gui.custom_graphics_view import CustomGraphicsView
+from gui.component_cache import ComponentRenderCache
+from gui.image_loader import ImageLoader
+from gui.profiling_overlay import ProfilingOverlay
+from gui.session import SessionRecorder
 from utils.theme import apply_dark_theme
 
 class ImageMixerApp(QMainWindow):
+    image_requested = pyqtSignal(int, str)  # input index, path of a load started by the user
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Image Mixer")
         self.setGeometry(100, 100, 1400, 900)
         self.combos = []
+        # IMAGE_MIXER_PADDING pads to FFT-friendly sizes; IMAGE_MIXER_RESIZE is first, largest or HxW
+        pad_mode = os.environ.get("IMAGE_MIXER_PADDING") or None
+        resize_policy = parse_resize_policy(os.environ.get("IMAGE_MIXER_RESIZE", "first"))
+        # Cached per-input contributions for live weight changes
+        self.live_mixer = LiveMixer(FourierBase(pad_mode=pad_mode))
+        # Incremental frames for region-size scrubbing and export
+        self.region_sweep = RegionSweep(FourierBase(pad_mode=pad_mode))
+        # Both are prepared on the mixing worker; live_version changes whenever their inputs do
+        self.live_version = 0
+        self.live_request = None  # live_key() of the engine being prepared
+        self.stale_generation = 0  # Worker results older than the last live frame are dropped
         self.initUI()
         self.input_images = [None] * 4
         self.fft_components = [None] * 4
         self.output_image = None
-        self.processor = None
+        self.output_specs = [None, None]  # Last mix spec per output view, with the inputs it was made from
+        self.image_loaders = {}  # input index -> ImageLoader of the latest load
+        self.running_loaders = set()  # Every loader still decoding, superseded or not, kept alive until it finishes
+        # One persistent worker; newer requests supersede older ones. Inputs are ingested in parallel,
+        # or the whole mix runs on a shared-memory process pool when IMAGE_MIXER_PROCESSES is set.
+        processes = int(os.environ.get("IMAGE_MIXER_PROCESSES", "0")) or None
+        # Large mixes show a 256 px preview first, then refine at full resolution
+        # Mixes larger than IMAGE_MIXER_RAM_LIMIT (e.g. 4G) run out of core over scratch files
+        ram_limit = os.environ.get("IMAGE_MIXER_RAM_LIMIT")
+        # One ingest thread per input view; the pipeline splits the cores between their FFTs
+        ingest_workers = min(os.cpu_count() or 1, len(self.viewports))
+        self.processor = MixingWorker(ingest_workers=ingest_workers, processes=processes, preview_size=256,
+                                      pad_mode=pad_mode, resize_policy=resize_policy,
+                                      ram_limit=parse_size(ram_limit) if ram_limit else None)
+        self.processor.progress.connect(self.update_progress)
+        self.processor.stage_progress.connect(self.show_stage_progress)
+        self.processor.result.connect(self.display_result)
+        self.processor.results.connect(self.display_results)
+        self.processor.latency.connect(self.show_mix_latency)
+        self.processor.task_done.connect(self.on_live_engine_ready)
+        self.processor.start()
+        self.fourier = FourierBase()  # Shares the spectrum cache with ImageProcessor
+        self.component_renders = ComponentRenderCache(self.fourier, ram_limit=self.processor.ram_limit)
         apply_dark_theme()
         self.region_size_slider = None  # Slider to adjust region size
         self.region_rect = None  # Store the unified region rectangle
         self.result_views = []
+        # IMAGE_MIXER_RECORD=session.jsonl records the interaction for replay_session.py
+        record_path = os.environ.get("IMAGE_MIXER_RECORD")
+        self.session_recorder = SessionRecorder(self, record_path) if record_path else None
         
 
     def initUI(self):
@@ -34,6 +81,11 @@ class ImageMixerApp(QMainWindow):
         self.setCentralWidget(central_widget)
 
         main_layout = QHBoxLayout(central_widget)
+        # F12 toggles the span timing overlay (IMAGE_MIXER_PROFILE_OVERLAY=1 shows it at startup)
+        self.profiling_overlay = ProfilingOverlay(central_widget)
+        QShortcut(QKeySequence(Qt.Key_F12), self, activated=self.profiling_overlay.toggle)
+        if os.environ.get("IMAGE_MIXER_PROFILE_OVERLAY"):
+            self.profiling_overlay.toggle()
 
         left_layout = QVBoxLayout()
         top_row_layout = QHBoxLayout()
@@ -63,8 +115,11 @@ class ImageMixerApp(QMainWindow):
         output_layout = QVBoxLayout(self.output_group)
 
         self.inner_region_radio = QRadioButton("Inner Region")
+        self.inner_region_radio.setObjectName("inner_region_radio")
         self.inner_region_radio.toggled.connect(self.on_inner_region_selected)
+        self.inner_region_radio.toggled.connect(self.invalidate_live_mix)
         self.outer_region_radio = QRadioButton("Outer Region")
+        self.outer_region_radio.setObjectName("outer_region_radio")
         self.outer_region_radio.toggled.connect(self.on_outer_region_selected)
 
         self.region_size_slider = QSlider(Qt.Horizontal)
@@ -73,6 +128,7 @@ class ImageMixerApp(QMainWindow):
         self.region_size_slider.setValue(50)
         self.region_size_slider.setObjectName("region_size_slider")
         self.region_size_slider.valueChanged.connect(self.update_region_size)
+        self.region_size_slider.valueChanged.connect(self.on_region_size_changed)
 
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
@@ -85,12 +141,14 @@ class ImageMixerApp(QMainWindow):
 
         self.mode = QComboBox()
         self.mode.addItems(["Select Mode","Magnitude and Phase" , "Real and Imaginary"])
+        self.mode.setObjectName("mode_selector")
         output_layout.addWidget(self.mode)
         self.mode.currentIndexChanged.connect(self.update_modes)
 
         self.output_viewports = []
         for i in range(2):
             output_viewport, result_view = self.create_output_viewport(f"Output View {i + 1}")
+            result_view.setObjectName(f"output_view_{i}")
             self.output_viewports.append(output_viewport)
             output_layout.addWidget(output_viewport)
 
@@ -143,10 +201,13 @@ class ImageMixerApp(QMainWindow):
         slider.setMaximum(100) 
         slider.setValue(1) # Default value 
         slider.setObjectName(f"weight_slider_{input_index}")
+        slider.valueChanged.connect(self.on_weight_changed)
 
         combo_box = QComboBox()
         combo_box.addItems(["Select Component", "FT Magnitude", "FT Phase", "FT Real", "FT Imaginary"])
+        combo_box.setObjectName(f"component_selector_{input_index}")
         combo_box.currentIndexChanged.connect(lambda _, idx=input_index : self.update_component_display(idx))  # Pass input index
+        combo_box.currentIndexChanged.connect(self.invalidate_live_mix)
         self.combos.append(combo_box)
 
         layout.addWidget(title_label)
@@ -189,48 +250,20 @@ class ImageMixerApp(QMainWindow):
                 print(f"No image loaded for input {input_index + 1}.")
                 return
 
-            fft = np.fft.fft2(image)
-            fft_shift = np.fft.fftshift(fft)
-
-            if selected_component == "FT Magnitude":
-                component = np.log(np.abs(fft_shift) + 1)  # Log scale for better visualization
-            elif selected_component == "FT Phase":
-                component = np.angle(fft_shift)
-            elif selected_component == "FT Real":
-                component = np.real(fft_shift)
-            elif selected_component == "FT Imaginary":
-                component = np.imag(fft_shift)
-            else:
+            if selected_component not in ComponentRenderCache.COMPONENTS:
                 print(f"Invalid component selected: {selected_component}")
                 return
 
-            
-
-            # Normalize component to displayable range (0-255)
-            normalized_component = cv2.normalize(component, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+            with instrumentation.span("component_display", component=selected_component):
+                # Normalized uint8 rendering, usually already warmed in the background by load_image
+                rendering = self.component_renders.get(image, selected_component)
 
-            # Update the Fourier Component View
-            component_view = self.viewports[input_index].findChild(QGraphicsView, f"component_view_{input_index}")
-            if component_view is not None:
-                scene = QGraphicsScene()
-                height, width = normalized_component.shape
-                bytes_per_line = width
-                qimage = QImage(normalized_component.data, width, height, bytes_per_line, QImage.Format_Grayscale8)
-                pixmap = QPixmap.fromImage(qimage)
-
-                # Scale the pixmap to fit the viewport, maintaining aspect ratio
-                viewport_size = component_view.size()
-                scaled_pixmap = pixmap.scaled(
-                    viewport_size.width(),
-                    viewport_size.height(),
-                    Qt.KeepAspectRatio,
-                    Qt.SmoothTransformation
-                )
-
-                scene.addPixmap(scaled_pixmap)
-                component_view.setScene(scene)
-            else:
-                print(f"Fourier Component View not found for input {input_index + 1}.")
+                # Update the Fourier Component View
+                component_view = self.viewports[input_index].findChild(QGraphicsView, f"component_view_{input_index}")
+                if component_view is not None:
+                    component_view.set_source(rendering.source, pyramid=rendering)
+                else:
+                    print(f"Fourier Component View not found for input {input_index + 1}.")
         except Exception as e:
             print(f"Error updating component display: {e}")
 
@@ -239,48 +272,55 @@ class ImageMixerApp(QMainWindow):
         try:
             path, _ = QFileDialog.getOpenFileName(self, "Open Image", "", "Images (*.png *.jpg *.bmp)")
             if path:
-                print(f"Selected image path: {path}")
-                image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-                #self.update_component_display(input_index , "FT Magnitude")
-                
-                if image is None:
-                    print(f"Failed to load image: {path}")
-                else:
-                    print(f"Image loaded successfully: {path}")
-                    self.input_images[input_index] = image
-                    self.display_image(image, viewport)
-
-
-                    
+                self.load_image_path(path, input_index)
             else:
                 print("No image selected.")
         except Exception as e:
             print(f"An error occurred while loading the image: {e}")
 
-    def display_image(self, image, viewport):
+    def load_image_path(self, path, input_index):
+        """Decode path off the GUI thread into an input; a newer load for the same slot supersedes this one."""
+        instrumentation.event("load_image", path=path, input=input_index + 1)
+        self.image_requested.emit(input_index, path)
+        loader = ImageLoader(path, input_index)
+        loader.loaded.connect(self.on_image_loaded)
+        loader.failed.connect(self.on_image_load_failed)
+        loader.finished.connect(self.on_image_loader_finished)
+        self.image_loaders[input_index] = loader
+        self.running_loaders.add(loader)
+        loader.start()
+
+    def on_image_loader_finished(self):
+        self.running_loaders.discard(self.sender())
+
+    def on_image_loaded(self, input_index, image):
+        if self.sender() is not self.image_loaders.get(input_index):
+            return  # Superseded by a newer load
         try:
-            if image is not None and image.size >0:
-                print(f"Displaying image of shape: {image.shape}")
-
-                # Convert image to QPixmap
-                height, width = image.shape
-                bytes_per_line = width
-                qimage = QImage(image.data, width, height, bytes_per_line, QImage.Format_Grayscale8)
-                pixmap = QPixmap.fromImage(qimage)
-
+            instrumentation.event("image_loaded", path=self.sender().path, input=input_index + 1)
+            self.input_images[input_index] = image
+            self.invalidate_live_mix()
+            viewport = self.viewports[input_index].findChild(CustomGraphicsView, f"original_view_{input_index}")
+            self.display_image(image, viewport)
+            component_view = self.viewports[input_index].findChild(QGraphicsView, f"component_view_{input_index}")
+            view_size = (component_view.width(), component_view.height()) if component_view else None
+            self.component_renders.warm(image, view_size)
+            # Refresh a component view that was showing the previous image
+            if self.component_selectors[input_index].currentText() in ComponentRenderCache.COMPONENTS:
+                self.update_component_display(input_index)
+        except Exception as e:
+            print(f"An error occurred while loading the image: {e}")
 
-                # Resize the pixmap to fit the viewport, keeping aspect ratio
-                viewport_size = viewport.size()
-                scaled_pixmap = pixmap.scaled(
-                    viewport_size.width(),
-                    viewport_size.height(),
-                    Qt.KeepAspectRatio,
-                    Qt.SmoothTransformation
-                )
+    def on_image_load_failed(self, input_index, message):
+        print(message)
 
-                # Display the scaled pixmap using CustomGraphicsView's set_image
+    def display_image(self, image, viewport):
+        try:
+            if image is not None and image.size >0:
+                # The view scales through its cached pyramid, keeping the aspect ratio
                 if isinstance(viewport, CustomGraphicsView):
-                    viewport.set_image(scaled_pixmap)
+                    with instrumentation.span("display", shape=image.shape):
+                        viewport.set_source(image)
                 else:
                     print("Viewport is not a CustomGraphicsView instance.")
 
@@ -311,74 +351,233 @@ class ImageMixerApp(QMainWindow):
 
         self.select_output_view_combo = QComboBox()
         self.select_output_view_combo.addItems(["Select Output View", "Output View 1", "Output View 2"])
+        self.select_output_view_combo.setObjectName("output_view_selector")
 
         self.start_mixing_button = QPushButton("Start Mixing")
+        self.start_mixing_button.setObjectName("start_mixing_button")
         self.start_mixing_button.clicked.connect(self.start_mixing)
 
+        self.export_sweep_button = QPushButton("Export Region Sweep")
+        self.export_sweep_button.clicked.connect(self.export_region_sweep)
+
         control_layout.addWidget(QLabel("Select which output viewport to display result:"))
         control_layout.addWidget(self.select_output_view_combo)
         control_layout.addWidget(self.start_mixing_button)
+        control_layout.addWidget(self.export_sweep_button)
 
         return control_widget
     
+    def mix_parameters(self):
+        """Collect images, components, region, weights and region size for the loaded inputs."""
+        # Filter out None images
+        valid_images = [image for image in self.input_images if image is not None]
+        if not valid_images:
+            return None
+
+        # Get selected components and region
+        components = [selector.currentText() if self.input_images[idx] is not None else "None" for idx, selector in enumerate(self.component_selectors)]
+        components = [comp for comp in components if comp != "None"]
+        region = "Inner" if self.inner_region_radio.isChecked() else "Outer"
+
+        # Get weights from sliders
+        weights = []
+        for i in range(4):  # Assuming 4 input viewports
+            slider = self.findChild(QSlider, f"weight_slider_{i}")
+            if slider:
+                weights.append(slider.value() / 100.0)  # Normalize to range 0.0 - 1.0
+            else:
+                print(f"Slider {i} not found.")
+                weights.append(0.0)  # Default to 0 if no slider is found
+
+        # Filter weights for valid images
+        weights = [weights[i] for i in range(4) if self.input_images[i] is not None]
+
+        # Get region size from the slider
+        region_size_slider = self.findChild(QSlider, "region_size_slider")
+        if region_size_slider:
+            region_size = region_size_slider.value()
+        else:
+            print("Region size slider not found.")
+            region_size = 50  # Default to 50 if slider is not found
+
+        return valid_images, components, region, weights, region_size
+
     def start_mixing(self):
         try:
-            # Filter out None images
-            valid_images = [image for image in self.input_images if image is not None]
-            if not valid_images:
+            params = self.mix_parameters()
+            if params is None:
                 print("No valid input images available.")
                 QMessageBox.warning(self, "Input Error", "Please load at least one input image before starting the mixing process.")
                 return
+            valid_images, components, region, weights, region_size = params
 
-            # Get selected components and region
-            components = [selector.currentText() if self.input_images[idx] is not None else "None" for idx, selector in enumerate(self.component_selectors)]
-            components = [comp for comp in components if comp != "None"]
-            region = "Inner" if self.inner_region_radio.isChecked() else "Outer"
-
-            # Get weights from sliders
-            weights = []
-            for i in range(4):  # Assuming 4 input viewports
-                slider = self.findChild(QSlider, f"weight_slider_{i}")
-                if slider:
-                    print(f"Slider {i} value: {slider.value()}")
-                    weights.append(slider.value() / 100.0)  # Normalize to range 0.0 - 1.0
-                else:
-                    print(f"Slider {i} not found.")
-                    weights.append(0.0)  # Default to 0 if no slider is found
-
-            # Filter weights for valid images
-            weights = [weights[i] for i in range(4) if self.input_images[i] is not None]
+            # Queue the request; the worker drops or cancels any older one without blocking the GUI
+            instrumentation.event("submit_mix", weights=weights, region_size=region_size)
+            view = self.select_output_view_combo.currentIndex() - 1
+            if view < 0:
+                self.processor.submit(valid_images, components, region, weights, region_size)
+                return
+            # Both output views are refreshed from one set of forward FFTs while they share the same inputs
+            self.output_specs[view] = (valid_images, {"view": view, "components": components, "weights": weights,
+                                                "region": region, "region_size": region_size})
+            specs = [spec for spec_inputs, spec in filter(None, self.output_specs)
+                     if len(spec_inputs) == len(valid_images) and all(a is b for a, b in zip(spec_inputs, valid_images))]
+            self.processor.submit_many(valid_images, specs)
+        except Exception as e:
+            print(f"Error starting the mixing process: {e}")
 
-            # Get region size from the slider
-            region_size_slider = self.findChild(QSlider, "region_size_slider")
-            if region_size_slider:
-                region_size = region_size_slider.value()
-                print(f"Region size: {region_size}")
+    def invalidate_live_mix(self, *args):
+        """Forget cached live-mix contributions after inputs, components or the region change."""
+        self.live_version += 1
+        self.live_mixer.invalidate()
+        self.region_sweep.invalidate()
+
+    def live_key(self, kind, params):
+        """What a live engine of kind ("live" or "sweep") prepared from params stays valid for."""
+        valid_images, components, region, weights, region_size = params
+        varying = region_size if kind == "live" else tuple(weights)  # The sweep varies the size, the live mix the weights
+        return kind, self.live_version, tuple(components), region, varying
+
+    def request_live_engine(self, kind, params):
+        """Prepare a LiveMixer ("live") or RegionSweep ("sweep") for params on the mixing worker."""
+        key = self.live_key(kind, params)
+        if key == self.live_request:
+            return  # Already being prepared
+        valid_images, components, region, weights, region_size = params
+        target_shape = self.processor.target_shape(valid_images)
+        if self.processor.exceeds_ram_limit(len(valid_images), target_shape):
+            # Live engines hold every input's spectrum in memory; let the worker mix out of core instead
+            self.start_mixing()
+            return
+        self.live_request = key
+        if kind == "live":
+            engine = LiveMixer(self.live_mixer.engine)
+            task = lambda: engine.prepare(valid_images, components, region.lower(), region_size, target_shape) and engine
+        else:
+            engine = RegionSweep(self.region_sweep.engine)
+            task = lambda: engine.prepare(valid_images, components, weights, region.lower(), target_shape) and engine
+        self.processor.submit_task(key, task)
+
+    def on_live_engine_ready(self, key, engine):
+        """Install a live engine prepared on the worker, unless its inputs changed meanwhile."""
+        if key != self.live_request:
+            return  # Superseded by a newer request
+        self.live_request = None
+        params = self.mix_parameters()
+        if not engine or params is None or self.live_key(key[0], params) != key:
+            return
+        if key[0] == "live":
+            self.live_mixer = engine
+            self.on_weight_changed(None)
+        else:
+            self.region_sweep = engine
+            self.on_region_size_changed(params[4])
+
+    def show_live_frame(self, image, params):
+        """Show a live remix or sweep frame, dropping any worker result computed with older parameters."""
+        self.stale_generation = self.processor.supersede()
+        # Later mixes for the other view re-mix this one from its recorded spec, which must match what is shown
+        valid_images, components, region, weights, region_size = params
+        view = self.select_output_view_combo.currentIndex() - 1
+        self.output_specs[view] = (valid_images, {"view": view, "components": components, "weights": weights,
+                                                  "region": region, "region_size": region_size})
+        self.display_result(image)
+
+    def prepare_region_sweep(self):
+        """Return True once the region sweep holds the mixed spectrum of the current inputs and weights."""
+        if self.region_sweep.is_ready:
+            return True
+        params = self.mix_parameters()
+        if params is None:
+            return False
+        valid_images, components, region, weights, region_size = params
+        return self.region_sweep.prepare(valid_images, components, weights, region.lower(),
+                                         self.processor.target_shape(valid_images))
+
+    def on_region_size_changed(self, value):
+        """Step the region sweep to the new size so scrubbing the slider updates the output live."""
+        self.live_mixer.invalidate()
+        try:
+            if self.select_output_view_combo.currentIndex() == 0:
+                return  # No output view selected, nothing to show
+            params = self.mix_parameters()
+            if params is None:
+                return
+            if self.region_sweep.is_ready:
+                self.show_live_frame(self.region_sweep.frame(value), params)
             else:
-                print("Region size slider not found.")
-                region_size = 50  # Default to 50 if slider is not found
-
-            # Cancel the previous task if any is running
-            if self.processor and self.processor.isRunning():
-                self.processor.running = False
-                self.processor.wait()
-
-            # Start a new processing task with region_size
-            print(f"Starting ImageProcessor with weights: {weights} and region size: {region_size}")
-            self.processor = ImageProcessor(valid_images, components, region, weights, region_size)
-            self.processor.progress.connect(self.update_progress)
-            self.processor.result.connect(self.display_result)
-            self.processor.start()
+                self.request_live_engine("sweep", params)
         except Exception as e:
-            print(f"Error starting the mixing process: {e}")
+            print(f"Error updating region sweep: {e}")
+
+    def export_region_sweep(self):
+        """Export the mixed output at every region size from 0% to 100% as a video."""
+        try:
+            inputs = [image for image in self.input_images if image is not None]
+            if inputs and self.processor.exceeds_ram_limit(len(inputs), self.processor.target_shape(inputs)):
+                # The sweep keeps the whole mixed spectrum and output in memory
+                QMessageBox.warning(self, "Input Error", "The inputs are too large for a region sweep within IMAGE_MIXER_RAM_LIMIT.")
+                return
+            if not self.prepare_region_sweep():
+                QMessageBox.warning(self, "Input Error", "Please load at least one input image before exporting a region sweep.")
+                return
+            path, _ = QFileDialog.getSaveFileName(self, "Export Region Sweep", "region_sweep.mp4", "Videos (*.mp4 *.avi)")
+            if path:
+                self.region_sweep.export(path)
+                self.statusBar().showMessage(f"Region sweep exported to {path}")
+        except Exception as e:
+            print(f"Error exporting region sweep: {e}")
+
+    def on_weight_changed(self, value):
+        """Remix from cached per-input contributions so the weight sliders drive the output live."""
+        self.region_sweep.invalidate()
+        try:
+            if self.select_output_view_combo.currentIndex() == 0:
+                return  # No output view selected, nothing to show
+            params = self.mix_parameters()
+            if params is None:
+                return
+            if not self.live_mixer.is_ready:
+                self.request_live_engine("live", params)
+                return
+            self.show_live_frame(self.live_mixer.remix(params[3]), params)
+        except Exception as e:
+            print(f"Error updating live mix: {e}")
 
 
     def update_progress(self, value):
         self.progress_bar.setValue(value)
 
+    def show_stage_progress(self, stage, done, total):
+        self.statusBar().showMessage(f"Mixing: {stage} {done}/{total}")
+
+    def show_mix_latency(self, milliseconds):
+        self.statusBar().showMessage(f"Mixed in {milliseconds:.1f} ms")
+
+    def closeEvent(self, event):
+        if self.session_recorder is not None:
+            self.session_recorder.close()
+        self.processor.stop()
+        self.processor.wait()
+        self.component_renders.shutdown()
+        super().closeEvent(event)
+
+    def display_results(self, pairs):
+        """Show every (spec, image) pair of a multi-spec mix in the output view named by its spec."""
+        selected_view = self.select_output_view_combo.currentIndex() - 1
+        for spec, image in pairs:
+            if spec.get("generation", self.stale_generation) < self.stale_generation:
+                continue  # Computed before a live frame replaced it
+            if image is None or image.size <= 1:
+                print(f"Received invalid image for Output View {spec['view'] + 1}.")
+                continue
+            if spec["view"] == selected_view:
+                self.output_image = image
+            self.display_image(image, self.output_viewports[spec["view"]].findChild(CustomGraphicsView))
+            instrumentation.event("output_displayed", view=spec["view"] + 1)
+
     def display_result(self, image):
         if image is not None and image.size > 1:  # Ensure the image is valid and larger than a minimal placeholder
-            print(f"Displaying image with shape: {image.shape}")
             self.output_image = image
             selected_output = self.select_output_view_combo.currentText()
             
@@ -386,14 +585,14 @@ class ImageMixerApp(QMainWindow):
                 result_view = self.output_viewports[0]  # Use the stored reference to the first output viewport
                 if result_view:
                     self.display_image(image, result_view.findChild(CustomGraphicsView))
-                    print("Image displayed in Output View 1.")
+                    instrumentation.event("output_displayed", view=1)
                 else:
                     print("Result view not found for Output View 1.")
             elif selected_output == "Output View 2":
                 result_view = self.output_viewports[1]  # Use the stored reference to the second output viewport
                 if result_view:
                     self.display_image(image, result_view.findChild(CustomGraphicsView))
-                    print("Image displayed in Output View 2.")
+                    instrumentation.event("output_displayed", view=2)
                 else:
                     print("Result view not found for Output View 2.")
         else:
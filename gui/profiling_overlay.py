@@ -0,0 +1,43 @@
+# gui/profiling_overlay.py
+from PyQt5.QtWidgets import QLabel
+from PyQt5.QtCore import Qt, QTimer
+from processing.instrumentation import instrumentation
+
+
+class ProfilingOverlay(QLabel):
+    """Translucent per-span timing table drawn over the main window.
+
+    toggle() shows or hides it (enabling instrumentation when shown); while
+    visible the table is refreshed from instrumentation.summary() twice a second.
+    """
+    REFRESH_MS = 500
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.PlainText)
+        self.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 170); color: #9f9; font-family: monospace; padding: 6px;")
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        if self.isVisible():
+            self.timer.stop()
+            self.hide()
+            return
+        instrumentation.enable()
+        self.refresh()
+        self.show()
+        self.raise_()
+        self.timer.start()
+
+    def refresh(self):
+        lines = [f"{'span':<20}{'count':>7}{'mean':>9}{'p95':>9}{'max':>9}  ms"]
+        for name, stats in instrumentation.summary().items():
+            lines.append(f"{name:<20}{stats['count']:>7}{stats['mean_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['max_ms']:>9.2f}")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(8, 8)
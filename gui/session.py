@@ -0,0 +1,327 @@
+# gui/session.py
+"""Record a GUI session and replay it to measure interaction latency.
+
+SessionRecorder writes one JSON object per line: a header with the window
+size, then every user event with its time in seconds since recording began:
+image loads, combo box and radio button selections, slider values, Start
+Mixing clicks and mouse drags on the image views. Widgets are addressed by
+object name, so a session replays against any build with the same names.
+
+SessionPlayer replays a session against an ImageMixerApp on its recorded
+schedule (or faster). It times every event as dispatch plus the posted
+events it produced (repaints, queued signals), times image loads and mixes
+until their result arrives, and counts dropped frames with a frame clock
+whose ticks arrive late whenever the GUI thread is busy.
+
+Usage: python replay_session.py session.jsonl [--speed 1.0] [--report report.json]
+                                [--max-p95 MS] [--max-dropped N] [--timeout SECONDS]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from PyQt5.QtWidgets import QApplication, QComboBox, QSlider, QRadioButton, QPushButton, QDialog
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtCore import QObject, QEvent, QEventLoop, QPointF, QTimer, Qt
+from processing.instrumentation import Histogram
+from gui.custom_graphics_view import CustomGraphicsView
+
+SESSION_FORMAT = "image-mixer-session"
+SESSION_VERSION = 1
+RECORDED_BUTTONS = ("start_mixing_button",)  # Buttons that open dialogs are not replayable headless
+MOUSE_EVENTS = {
+    QEvent.MouseButtonPress: "press",
+    QEvent.MouseMove: "move",
+    QEvent.MouseButtonRelease: "release",
+}
+MOUSE_TYPES = {name: event_type for event_type, name in MOUSE_EVENTS.items()}
+
+
+def load_session(path):
+    """Return (header, events) of a recorded session."""
+    with open(path) as session_file:
+        lines = [json.loads(line) for line in session_file if line.strip()]
+    if not lines or lines[0].get("format") != SESSION_FORMAT:
+        raise ValueError(f"Not a recorded session: {path}")
+    if lines[0].get("version", 0) > SESSION_VERSION:
+        raise ValueError(f"Unsupported session version {lines[0]['version']} in {path}")
+    return lines[0], lines[1:]
+
+
+class SessionRecorder(QObject):
+    """Appends the user events of an ImageMixerApp to a session file."""
+
+    def __init__(self, window, path):
+        super().__init__(window)
+        self.window = window
+        self.session_file = open(path, "w")
+        self.start = time.perf_counter()
+        self._pressed = set()  # Views with a mouse button held down
+        self._write({"format": SESSION_FORMAT, "version": SESSION_VERSION,
+                     "size": [window.width(), window.height()]})
+        window.image_requested.connect(lambda index, image_path: self.record("load", input=index,
+                                                                             path=os.path.abspath(image_path)))
+        for combo in window.findChildren(QComboBox):
+            if combo.objectName():
+                combo.currentIndexChanged.connect(lambda index, name=combo.objectName(): self.record("combo", widget=name, index=index))
+        for slider in window.findChildren(QSlider):
+            if slider.objectName():
+                slider.valueChanged.connect(lambda value, name=slider.objectName(): self.record("slider", widget=name, value=value))
+        for radio in window.findChildren(QRadioButton):
+            if radio.objectName():
+                radio.toggled.connect(lambda checked, name=radio.objectName(): checked and self.record("radio", widget=name))
+        for button in window.findChildren(QPushButton):
+            if button.objectName() in RECORDED_BUTTONS:
+                button.clicked.connect(lambda _, name=button.objectName(): self.record("click", widget=name))
+        for view in window.findChildren(CustomGraphicsView):
+            if view.objectName():
+                view.viewport().setProperty("session_view", view.objectName())
+                view.viewport().installEventFilter(self)
+
+    def record(self, event_type, **fields):
+        if self.session_file is None:
+            return
+        self._write(dict({"t": round(time.perf_counter() - self.start, 4), "type": event_type}, **fields))
+
+    def eventFilter(self, watched, event):
+        kind = MOUSE_EVENTS.get(event.type())
+        if kind is not None:
+            view = watched.property("session_view")
+            if kind == "press":
+                self._pressed.add(view)
+            # Bare hover moves do nothing in the views; only drags are worth replaying
+            if kind != "move" or view in self._pressed:
+                self.record("mouse", widget=view, action=kind, x=event.x(), y=event.y(), button=int(event.button()),
+                            buttons=int(event.buttons()))
+            if kind == "release":
+                self._pressed.discard(view)
+        return False
+
+    def close(self):
+        if self.session_file is not None:
+            self.session_file.close()
+            self.session_file = None
+
+    def _write(self, entry):
+        try:
+            self.session_file.write(json.dumps(entry) + "\n")
+            self.session_file.flush()  # Keep the session usable if the application crashes
+        except OSError as e:
+            print(f"Error recording session event: {e}")
+
+
+class SessionPlayer(QObject):
+    """Replays recorded events against an ImageMixerApp and collects latency statistics.
+
+    speed scales the recorded schedule (2.0 replays twice as fast); 0 replays
+    every event as soon as the previous one has been handled.
+    """
+
+    def __init__(self, window, events, speed=1.0):
+        super().__init__(window)
+        self.window = window
+        self.events = events
+        self.speed = speed
+        self.latencies = {}  # "type widget" -> Histogram of dispatch latencies
+        self.completions = {}  # "load" / "mix" -> Histogram of request-to-result latencies
+        self.frame_interval = CustomGraphicsView.refresh_interval_ms()
+        self.frames = 0
+        self.dropped_frames = 0
+        self.longest_stall = 0.0
+        self.dialogs_dismissed = 0
+        self.errors = 0
+        self._pending_loads = {}  # input index -> load dispatch time
+        self._pending_mix = None  # Dispatch time of the oldest unanswered mix
+        self._next = 0
+        self._last_tick = None
+        self._loop = QEventLoop()
+        self._dispatch_timer = QTimer(self)
+        self._dispatch_timer.setSingleShot(True)
+        self._dispatch_timer.timeout.connect(self._dispatch)
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setTimerType(Qt.PreciseTimer)
+        self._frame_timer.setInterval(self.frame_interval)
+        self._frame_timer.timeout.connect(self._tick)
+        window.processor.latency.connect(self._mix_finished)
+
+    def play(self, timeout=120):
+        """Replay every event, wait up to timeout seconds for outstanding results and return the report."""
+        self.start = time.perf_counter()
+        self.deadline = None
+        self.timeout = timeout
+        self._last_tick = self.start
+        self._frame_timer.start()
+        self._schedule()
+        self._loop.exec_()
+        self._frame_timer.stop()
+        return self.report()
+
+    def report(self):
+        def statistics(histograms):
+            return {
+                key: {
+                    "count": histogram.count,
+                    "mean_ms": histogram.total * 1000 / histogram.count,
+                    "p50_ms": histogram.percentile(0.5) * 1000,
+                    "p95_ms": histogram.percentile(0.95) * 1000,
+                    "p99_ms": histogram.percentile(0.99) * 1000,
+                    "max_ms": histogram.maximum * 1000,
+                }
+                for key, histogram in sorted(histograms.items())
+            }
+        return {
+            "events": statistics(self.latencies),
+            "completions": statistics(self.completions),
+            "frames": {
+                "interval_ms": self.frame_interval,
+                "frames": self.frames,
+                "dropped": self.dropped_frames,
+                "longest_stall_ms": self.longest_stall * 1000,
+            },
+            "dialogs_dismissed": self.dialogs_dismissed,
+            "errors": self.errors,
+            "unfinished": len(self._pending_loads) + (self._pending_mix is not None),
+        }
+
+    def _schedule(self):
+        if self._next >= len(self.events):
+            self.deadline = time.perf_counter() + self.timeout
+            return  # _tick finishes once outstanding loads and mixes are done
+        due = self.events[self._next]["t"] / self.speed if self.speed > 0 else 0.0
+        delay = due - (time.perf_counter() - self.start)
+        self._dispatch_timer.start(max(0, int(delay * 1000)))
+
+    def _dispatch(self):
+        event = self.events[self._next]
+        self._next += 1
+        key = f"{event['type']} {event.get('widget', '')}".strip()
+        start = time.perf_counter()
+        try:
+            self._apply(event, start)
+            QApplication.sendPostedEvents()  # Repaints and queued signals the event produced
+        except Exception as e:
+            self.errors += 1
+            print(f"Error replaying event {self._next}: {e}")
+        self._add(self.latencies, key, time.perf_counter() - start)
+        self._schedule()
+
+    def _apply(self, event, start):
+        window = self.window
+        event_type = event["type"]
+        if event_type == "load":
+            index = event["input"]
+            window.load_image_path(event["path"], index)
+            self._pending_loads[index] = start
+            loader = window.image_loaders[index]
+            loader.loaded.connect(lambda *_, index=index, loader=loader: self._load_finished(index, loader))
+            loader.failed.connect(lambda *_, index=index, loader=loader: self._load_finished(index, loader))
+        elif event_type == "combo":
+            window.findChild(QComboBox, event["widget"]).setCurrentIndex(event["index"])
+        elif event_type == "slider":
+            window.findChild(QSlider, event["widget"]).setValue(event["value"])
+        elif event_type == "radio":
+            window.findChild(QRadioButton, event["widget"]).setChecked(True)
+        elif event_type == "click":
+            if self._pending_mix is None:
+                self._pending_mix = start
+            window.findChild(QPushButton, event["widget"]).click()
+        elif event_type == "mouse":
+            view = window.findChild(CustomGraphicsView, event["widget"])
+            mouse_event = QMouseEvent(MOUSE_TYPES[event["action"]], QPointF(event["x"], event["y"]),
+                                      Qt.MouseButton(event["button"]), Qt.MouseButtons(event["buttons"]), Qt.NoModifier)
+            QApplication.sendEvent(view.viewport(), mouse_event)
+        else:
+            raise ValueError(f"Unknown event type: {event_type}")
+
+    def _load_finished(self, index, loader):
+        if self.window.image_loaders.get(index) is not loader:
+            return  # Superseded by a newer load, whose own completion is measured
+        start = self._pending_loads.pop(index, None)
+        if start is not None:
+            self._add(self.completions, "load", time.perf_counter() - start)
+
+    def _mix_finished(self, _milliseconds):
+        if self._pending_mix is not None:
+            self._add(self.completions, "mix", time.perf_counter() - self._pending_mix)
+            self._pending_mix = None
+
+    def _tick(self):
+        now = time.perf_counter()
+        gap = now - self._last_tick
+        self._last_tick = now
+        self.frames += 1
+        self.longest_stall = max(self.longest_stall, gap)
+        if gap * 1000 > 1.5 * self.frame_interval:
+            self.dropped_frames += int(round(gap * 1000 / self.frame_interval)) - 1
+        # A modal warning would block a headless replay forever
+        modal = QApplication.activeModalWidget()
+        if modal is not None:
+            self.dialogs_dismissed += 1
+            modal.reject() if isinstance(modal, QDialog) else modal.close()
+        if self.deadline is not None:
+            idle = not self._pending_loads and self._pending_mix is None
+            if idle or now > self.deadline:
+                self._loop.quit()
+
+    @staticmethod
+    def _add(histograms, key, seconds):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(max_samples=100000)
+        histogram.add(seconds)
+
+
+def print_report(report):
+    for title, section in (("Event latency", report["events"]), ("Completion latency", report["completions"])):
+        if not section:
+            continue
+        print(f"{title}:")
+        print(f"  {'event':<36}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  ms")
+        for key, stats in section.items():
+            print(f"  {key:<36}{stats['count']:>7}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}"
+                  f"{stats['p99_ms']:>9.2f}{stats['max_ms']:>9.2f}")
+    frames = report["frames"]
+    print(f"Frames: {frames['frames']} at {frames['interval_ms']} ms, {frames['dropped']} dropped, "
+          f"longest stall {frames['longest_stall_ms']:.1f} ms")
+    if report["dialogs_dismissed"] or report["errors"] or report["unfinished"]:
+        print(f"Dialogs dismissed: {report['dialogs_dismissed']}, errors: {report['errors']}, "
+              f"unfinished requests: {report['unfinished']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded Image Mixer session and report interaction latency.")
+    parser.add_argument("session", help="session file recorded with IMAGE_MIXER_RECORD")
+    parser.add_argument("--speed", type=float, default=1.0, help="schedule speed-up (0: replay as fast as possible)")
+    parser.add_argument("--report", default=None, help="write the report as JSON")
+    parser.add_argument("--max-p95", type=float, default=None, help="fail if any event type's p95 latency exceeds this (ms)")
+    parser.add_argument("--max-dropped", type=int, default=None, help="fail if more frames than this are dropped")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for outstanding loads and mixes")
+    args = parser.parse_args(argv)
+
+    header, events = load_session(args.session)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")  # Must be set before the QApplication exists
+    os.environ.pop("IMAGE_MIXER_RECORD", None)  # Do not record the replay itself
+    from gui.main_window import ImageMixerApp
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    window = ImageMixerApp()
+    window.resize(*header["size"])  # Mouse positions are relative to views laid out at this size
+    window.show()
+    app.processEvents()
+
+    report = SessionPlayer(window, events, args.speed).play(args.timeout)
+    window.close()
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+    failures = []
+    if args.max_p95 is not None:
+        failures += [f"{key}: p95 {stats['p95_ms']:.1f} ms" for key, stats in report["events"].items()
+                     if stats["p95_ms"] > args.max_p95]
+    if args.max_dropped is not None and report["frames"]["dropped"] > args.max_dropped:
+        failures.append(f"{report['frames']['dropped']} dropped frames")
+    for failure in failures:
+        print(f"  BUDGET EXCEEDED {failure}")
+    return 1 if failures or report["errors"] else 0
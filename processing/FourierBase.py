@@ -1,35 +1,178 @@
 # processing/base_processor.py
+import os
+from collections.abc import Mapping
 import numpy as np
 import cv2
-from PyQt5.QtCore import QThread, pyqtSignal
+from .spectrum_cache import spectrum_cache, resize_cache
+from .spectrum_store import spectrum_store
+from .instrumentation import instrumentation
+from .region_masks import region_masks
+from . import fft_backend
+
+# Working dtypes per precision. "single" halves spectrum memory and bandwidth; for 8-bit
+# inputs the mixed uint8 image differs from "double" by at most one gray level per pixel,
+# and only where a value sits next to an integer boundary. The float error before
+# quantization is about 255 * 6e-8 * log2(h * w) * sum(|weights|): under 0.002 gray
+# levels for four full-weight 8K x 8K inputs (measured: 7e-4 at 1021 x 769).
+PRECISIONS = {"double": (np.float64, np.complex128), "single": (np.float32, np.complex64)}
+DEFAULT_PRECISION = os.environ.get("IMAGE_MIXER_PRECISION", "double")
+# Border modes for padding inputs up to an FFT-friendly (5-smooth) working shape
+PAD_MODES = {"reflect": cv2.BORDER_REFLECT_101, "zero": cv2.BORDER_CONSTANT}
+
+class FourierComponents(Mapping):
+    """Lazy read-only view of the Magnitude/Phase/Real/Imaginary planes of one spectrum.
+
+    Planes are computed only when looked up (Real and Imaginary are views, not
+    copies), and the raw spectrum is available as .spectrum without rebuilding it.
+    """
+    PLANES = {"Magnitude": np.abs, "Phase": np.angle, "Real": np.real, "Imaginary": np.imag}
+
+    def __init__(self, spectrum):
+        self.spectrum = spectrum
+
+    def __getitem__(self, name):
+        return self.PLANES[name](self.spectrum)
+
+    def __iter__(self):
+        return iter(self.PLANES)
+
+    def __len__(self):
+        return len(self.PLANES)
+
 
 class FourierBase:
-    def __init__(self):
-        pass
+    COMPONENT_TYPES = ("FT Magnitude", "FT Phase", "FT Real", "FT Imaginary")
+    spectrum_kind = "full"
+
+    def __init__(self, cache=spectrum_cache, precision=None, pad_mode=None, store=spectrum_store):
+        self.cache = cache
+        self.store = store  # Optional SpectrumStore behind the in-memory cache
+        self.precision = precision or DEFAULT_PRECISION
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {self.precision}")
+        self.real_dtype, self.complex_dtype = PRECISIONS[self.precision]
+        if pad_mode is not None and pad_mode not in PAD_MODES:
+            raise ValueError(f"Unknown pad mode: {pad_mode}")
+        # With a pad mode, inputs are padded to working_shape() and results cropped back
+        self.pad_mode = pad_mode
+
+    def working_shape(self, shape):
+        """(h, w) the FFTs run at for inputs resized to shape: padded to 5-smooth lengths if pad_mode is set."""
+        h, w = shape[:2]
+        if self.pad_mode is None:
+            return h, w
+        return fft_backend.next_fast_length(h), fft_backend.next_fast_length(w)
 
     def compute_fft(self, image):
-        """Compute the FFT and shift it."""
-        fft = np.fft.fft2(image)
-        return np.fft.fftshift(fft)
+        """Compute the FFT and shift it (over the last two axes, so (N, h, w) stacks work too)."""
+        with instrumentation.span("fft", shape=image.shape):
+            fft = fft_backend.get_backend(image.shape).fft2(image)
+            return np.fft.fftshift(fft.astype(self.complex_dtype, copy=False), axes=(-2, -1))
+
+    def get_spectrum(self, image, target_shape=None):
+        """Return the shifted FFT of image resized to target_shape, reusing the spectrum cache."""
+        if target_shape is None:
+            target_shape = image.shape
+        return self.get_spectra([image], target_shape)[0]
+
+    def spectrum_key(self, image, target_shape):
+        """Spectrum cache key of image resized to target_shape for this engine, precision and padding."""
+        kind = f"{self.spectrum_kind}-{self.precision}"
+        if self.pad_mode is not None:
+            kind += f"-{self.pad_mode}"
+        return self.cache.make_key(image, target_shape, kind)
+
+    def cached_spectrum(self, key):
+        """Return the spectrum for key from the memory cache or, failing that, the on-disk store."""
+        spectrum = self.cache.get(key)
+        if spectrum is None and self.store is not None:
+            spectrum = self.store.load(key)
+            if spectrum is not None:
+                spectrum = self.cache.put(key, spectrum)
+        return spectrum
+
+    def remember_spectrum(self, key, spectrum):
+        """Put a freshly computed spectrum in the memory cache and the on-disk store."""
+        if self.store is not None:
+            self.store.save(key, spectrum)
+        return self.cache.put(key, spectrum)
+
+    def prepare_input(self, image, target_shape, key=None):
+        """Return image resized to target_shape and padded to its working shape, reusing resize_cache.
+
+        key is the image's spectrum key, whose content hash is reused for the resize cache.
+        """
+        h, w = target_shape[:2]
+        working_h, working_w = self.working_shape(target_shape)
+        if image.shape[:2] == (h, w) == (working_h, working_w):
+            return np.asarray(image)
+        key = key or self.spectrum_key(image, target_shape)
+        resized_key = (key[0], key[1], f"resized-{self.pad_mode}")
+        resized = resize_cache.get(resized_key)
+        if resized is None:
+            with instrumentation.span("resize", shape=(working_h, working_w)):
+                image = np.asarray(image)  # Decodes a StoredImage only now that its pixels are needed
+                resized = image if image.shape[:2] == (h, w) else cv2.resize(image, (w, h))
+                if (working_h, working_w) != (h, w):
+                    # Content stays at the top left so cropping the result back is a plain slice
+                    resized = cv2.copyMakeBorder(resized, 0, working_h - h, 0, working_w - w, PAD_MODES[self.pad_mode], value=0)
+            resized = resize_cache.put(resized_key, resized)
+        return resized
+
+    def get_spectra(self, images, target_shape):
+        """Return the shifted FFT of every image resized to target_shape.
+
+        Images missing from the spectrum cache are resized (and padded to the
+        working shape) into one (N, h, w) stack and transformed with a single
+        batched FFT. When none of them was cached that (N, h, w) batch is
+        returned as is, otherwise a list of (h, w) spectra.
+        """
+        h, w = self.working_shape(target_shape)
+        keys = [self.spectrum_key(image, target_shape) for image in images]
+        spectra = [self.cached_spectrum(key) for key in keys]
+        missing = [i for i, spectrum in enumerate(spectra) if spectrum is None]
+        if missing:
+            stack = np.empty((len(missing), h, w), dtype=self.real_dtype)
+            for slot, i in enumerate(missing):
+                stack[slot] = self.prepare_input(images[i], target_shape, keys[i])
+            batch = self.compute_fft(stack)
+            for slot, i in enumerate(missing):
+                spectra[i] = self.remember_spectrum(keys[i], batch[slot])
+            if len(missing) == len(images):
+                batch.flags.writeable = False  # Its slices are shared through the cache
+                return batch
+        return spectra
 
     def extract_components(self, fft_shift):
-        """Extract magnitude, phase, real, and imaginary components."""
-        return {
-            "Magnitude": np.abs(fft_shift),
-            "Phase": np.angle(fft_shift),
-            "Real": np.real(fft_shift),
-            "Imaginary": np.imag(fft_shift)
-        }
+        """Return a lazy view of the magnitude, phase, real, and imaginary components."""
+        return FourierComponents(fft_shift)
 
     def reconstruct_fft(self, component_type, component_data):
-        """Reconstruct the complex FT based on the selected component type."""
+        """Reconstruct the complex FT based on the selected component type.
+
+        component_data is a FourierComponents view or a plain dict of planes.
+        """
+        if component_type not in ["FT Magnitude", "FT Phase", "FT Real", "FT Imaginary"]:
+            raise ValueError(f"Unknown component type: {component_type}")
+        if isinstance(component_data, FourierComponents):
+            return component_data.spectrum  # Either pair recombines to the spectrum itself
         if component_type in ["FT Magnitude", "FT Phase"]:
             return component_data["Magnitude"] * np.exp(1j * component_data["Phase"])
-        elif component_type in ["FT Real", "FT Imaginary"]:
-            return component_data["Real"] + 1j * component_data["Imaginary"]
-        else:
-            raise ValueError(f"Unknown component type: {component_type}")
+        return component_data["Real"] + 1j * component_data["Imaginary"]
+
+    def spectrum_mask(self, mask):
+        """Map a mask defined over the full shifted spectrum onto this engine's spectrum layout."""
+        return mask
+
+    def mask_spectrum(self, spectrum, shape, region_type, region_size):
+        """Apply a region (see RegionMasks) laid out on the content shape to this engine's spectrum in place."""
+        with instrumentation.span("mask", region=region_type):
+            return region_masks.apply(spectrum, self.working_shape(shape), region_type, region_size, content_shape=shape)
 
-    def inverse_fft(self, mixed_ft):
-        """Apply inverse FFT to get the result."""
-        return np.fft.ifft2(np.fft.ifftshift(mixed_ft)).real
\ No newline at end of file
+    def inverse_fft(self, mixed_ft, shape=None):
+        """Apply inverse FFT to get the result, cropped back to shape when the inputs were padded."""
+        with instrumentation.span("ifft", shape=mixed_ft.shape):
+            result = fft_backend.get_backend(mixed_ft.shape).ifft2(np.fft.ifftshift(mixed_ft, axes=(-2, -1))).real
+            if shape is not None:
+                result = result[..., :shape[0], :shape[1]]
+            return result.astype(self.real_dtype, copy=False)
@@ -0,0 +1,62 @@
+# processing/RealFourierBase.py
+import numpy as np
+from .FourierBase import FourierBase
+from .region_masks import region_masks
+from .instrumentation import instrumentation
+from . import fft_backend
+
+class RealFourierBase(FourierBase):
+    """Half-spectrum engine for real-valued images built on rfft2/irfft2.
+
+    Spectra have shape (..., h, w // 2 + 1): rows are shifted like the full spectrum,
+    columns hold the non-negative horizontal frequencies 0 .. w // 2.
+    """
+    spectrum_kind = "half"
+
+    def compute_fft(self, image):
+        """Compute the half-spectrum FFT and shift it along the rows."""
+        with instrumentation.span("fft", shape=image.shape):
+            fft = fft_backend.get_backend(image.shape).rfft2(image)
+            return np.fft.fftshift(fft.astype(self.complex_dtype, copy=False), axes=-2)
+
+    def spectrum_mask(self, mask):
+        """Fold a mask over the full shifted spectrum onto the half-spectrum columns.
+
+        The full path keeps only the real part of ifft2, which is equivalent to
+        masking with (M(k) + M(-k)) / 2, so the folded mask is symmetrized the same
+        way to give identical output for masks that are not point-symmetric.
+        """
+        h, w = mask.shape
+        rows = np.arange(h)
+        cols = np.arange(w // 2 + 1)
+        # Full shifted index of frequency k is (k + n // 2) % n
+        full_cols = (cols + w // 2) % w
+        mirror_rows = (2 * (h // 2) - rows) % h
+        mirror_cols = (w // 2 - cols) % w
+        folded = mask[np.ix_(rows, full_cols)].astype(self.real_dtype)
+        folded += mask[np.ix_(mirror_rows, mirror_cols)]
+        folded *= 0.5
+        return folded
+
+    def mask_spectrum(self, spectrum, shape, region_type, region_size):
+        """Apply a region to a half-spectrum in place using the memoized folded mask."""
+        content = tuple(shape[:2])
+        h, w = self.working_shape(content)
+        key = ((h, w), region_type, region_size, self.spectrum_kind, self.precision, content)
+        with instrumentation.span("mask", region=region_type):
+            folded = region_masks.memoize(key, lambda: self.spectrum_mask(
+                region_masks.mask((h, w), region_type, region_size, content_shape=content)))
+            spectrum *= folded
+            return spectrum
+
+    def inverse_fft(self, mixed_ft, shape=None):
+        """Apply the inverse real FFT; shape is the (h, w) of the spatial result before padding."""
+        if shape is None:
+            raise ValueError("RealFourierBase.inverse_fft needs the output shape.")
+        h, w = shape[:2]
+        working = self.working_shape(shape)
+        with instrumentation.span("ifft", shape=working):
+            result = fft_backend.get_backend(working).irfft2(np.fft.ifftshift(mixed_ft, axes=-2), s=working)
+            if working != (h, w):
+                result = result[..., :h, :w]
+            return result.astype(self.real_dtype, copy=False)
@@ -1,4 +1,13 @@
 # processing/__init__.py
-from .image_processor import ImageProcessor
+from .mixing_core import MixingCore, RealMixingCore
+from .region_sweep import RegionSweep
+from .instrumentation import instrumentation
 
-__all__ = ['ImageProcessor']
\ No newline at end of file
+__all__ = ['MixingCore', 'RealMixingCore', 'RegionSweep', 'instrumentation']
+
+try:
+    from .image_processor import ImageProcessor, RealImageProcessor
+    from .mixing_worker import MixingWorker
+    __all__ += ['ImageProcessor', 'RealImageProcessor', 'MixingWorker']
+except ImportError:  # PyQt5 is optional for the headless batch mixer
+    pass
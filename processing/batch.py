@@ -0,0 +1,168 @@
+# processing/batch.py
+"""Headless batch mixer.
+
+Usage: python batch_mix.py manifest.json --output-dir out/ [--workers N] [--engine full|half]
+                          [--fft-backend auto|numpy|scipy|pyfftw] [--fft-workers N]
+                          [--precision double|single] [--pad reflect|zero]
+                          [--resize first|largest|HxW] [--spectrum-store DIR]
+                          [--ram-limit SIZE]
+
+The manifest is a JSON object with an optional "defaults" mapping and a "sets"
+list. Every set names its input image paths plus, optionally, "components",
+"weights", "region" ("Inner"/"Outer"), "region_size" (0-100) and "output";
+missing keys fall back to "defaults" and then to the GUI defaults.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import cv2
+from .mixing_core import MixingCore, RealMixingCore, parse_resize_policy
+from .FourierBase import PRECISIONS, PAD_MODES
+from .spectrum_store import SpectrumStore, spectrum_store
+from .out_of_core import parse_size
+from . import fft_backend
+
+SET_DEFAULTS = {
+    "components": None,  # One "FT Magnitude" per image
+    "weights": None,  # Equal weights summing to 1
+    "region": "Inner",
+    "region_size": 50,
+}
+ENGINES = {"full": MixingCore, "half": RealMixingCore}
+
+_core = None  # One core (and spectrum cache) per worker process
+
+
+def load_manifest(path):
+    """Read a manifest and return its sets with defaults filled in."""
+    with open(path) as manifest_file:
+        manifest = json.load(manifest_file)
+    defaults = dict(SET_DEFAULTS, **manifest.get("defaults", {}))
+    sets = []
+    for index, entry in enumerate(manifest["sets"]):
+        mix_set = dict(defaults, **entry)
+        count = len(mix_set["images"])
+        if not count:
+            raise ValueError(f"Set {index} has no images.")
+        mix_set.setdefault("name", f"set_{index:06d}")
+        if mix_set["components"] is None:
+            mix_set["components"] = ["FT Magnitude"] * count
+        if mix_set["weights"] is None:
+            mix_set["weights"] = [1.0 / count] * count
+        sets.append(mix_set)
+    return sets
+
+
+def _init_worker(engine, backend, fft_workers, precision, pad_mode=None, resize_policy="first", store_directory=None,
+                 ram_limit=None):
+    global _core
+    fft_backend.configure(backend, workers=fft_workers)
+    store = SpectrumStore(store_directory) if store_directory else spectrum_store
+    _core = ENGINES[engine](precision=precision, pad_mode=pad_mode, resize_policy=resize_policy, store=store,
+                            ram_limit=ram_limit)
+
+
+def mix_set(mix_set, output_dir):
+    """Mix one manifest set in a worker and write the result; returns (name, path, stage times)."""
+    stage_times = {}
+    start = time.perf_counter()
+    if _core.store is not None:
+        # Inputs seen by an earlier run are only decoded if one of their spectra was evicted
+        images = [_core.store.open_image(path) for path in mix_set["images"]]
+    else:
+        images = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in mix_set["images"]]
+    for path, image in zip(mix_set["images"], images):
+        if image is None:
+            raise ValueError(f"Failed to load image: {path}")
+    stage_times["decode"] = time.perf_counter() - start
+
+    mixed_image = _core.mix(images, mix_set["components"], mix_set["region"], mix_set["weights"], mix_set["region_size"])
+    if mixed_image is None:
+        raise ValueError("No valid FT components were mixed.")
+    stage_times.update(_core.stage_times)
+
+    start = time.perf_counter()
+    output_path = mix_set.get("output") or os.path.join(output_dir, f"{mix_set['name']}.png")
+    if not cv2.imwrite(output_path, mixed_image):
+        raise ValueError(f"Failed to write image: {output_path}")
+    stage_times["encode"] = time.perf_counter() - start
+    return mix_set["name"], output_path, stage_times
+
+
+def run_batch(sets, output_dir, workers=None, engine="full", max_in_flight=None, backend="auto", fft_workers=None,
+              precision=None, pad_mode=None, resize_policy="first", store_directory=None, ram_limit=None):
+    """Fan the sets out over a process pool, streaming results as they finish.
+
+    Returns a summary dict with counts, throughput and mean per-stage seconds.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    # Split the cores between processes so threaded FFT backends do not oversubscribe them
+    fft_workers = fft_workers or max(1, (os.cpu_count() or 1) // workers)
+    max_in_flight = max_in_flight or workers * 4
+    stage_totals = defaultdict(float)
+    done = failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine, backend, fft_workers, precision, pad_mode, resize_policy, store_directory, ram_limit)) as executor:
+        pending = {}
+        queued = iter(sets)
+        while True:
+            # Keep a bounded number of sets in flight so huge manifests do not pile up in memory
+            for mix_set_entry in queued:
+                pending[executor.submit(mix_set, mix_set_entry, output_dir)] = mix_set_entry["name"]
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = pending.pop(future)
+                try:
+                    _, output_path, stage_times = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"Error mixing {name}: {e}", file=sys.stderr)
+                    continue
+                done += 1
+                for stage, seconds in stage_times.items():
+                    stage_totals[stage] += seconds
+                print(f"[{done + failed}/{len(sets)}] {name} -> {output_path}")
+    elapsed = time.perf_counter() - start
+    return {
+        "sets": done,
+        "failed": failed,
+        "seconds": elapsed,
+        "sets_per_second": done / elapsed if elapsed > 0 else 0.0,
+        "stage_seconds": {stage: total / done for stage, total in stage_totals.items()} if done else {},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mix image sets from a manifest without the GUI.")
+    parser.add_argument("manifest", help="JSON manifest of input sets")
+    parser.add_argument("--output-dir", default="mixed", help="directory for results without an explicit output path")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="full", help="full complex FFT or rfft2 half-spectrum")
+    parser.add_argument("--fft-backend", choices=["auto"] + sorted(fft_backend.BACKENDS), default="auto", help="FFT library (auto benchmarks the installed ones)")
+    parser.add_argument("--fft-workers", type=int, default=None, help="threads per FFT (default: cores / workers)")
+    parser.add_argument("--precision", choices=sorted(PRECISIONS), default=None, help="float64/complex128 or float32/complex64 processing")
+    parser.add_argument("--pad", choices=sorted(PAD_MODES), default=None, help="pad inputs to FFT-friendly (5-smooth) sizes")
+    parser.add_argument("--resize", type=parse_resize_policy, default="first", help="resize inputs to the first, the largest or a fixed HxW shape")
+    parser.add_argument("--spectrum-store", default=None, help="directory of spectra reused across runs (default: IMAGE_MIXER_SPECTRUM_STORE)")
+    parser.add_argument("--ram-limit", type=parse_size, default=None, help="per-worker memory ceiling (e.g. 2G); larger mixes run out of core")
+    args = parser.parse_args(argv)
+
+    sets = load_manifest(args.manifest)
+    summary = run_batch(sets, args.output_dir, workers=args.workers, engine=args.engine,
+                        backend=args.fft_backend, fft_workers=args.fft_workers, precision=args.precision,
+                        pad_mode=args.pad, resize_policy=args.resize, store_directory=args.spectrum_store,
+                        ram_limit=args.ram_limit)
+    print(f"Mixed {summary['sets']} sets ({summary['failed']} failed) in {summary['seconds']:.2f} s: "
+          f"{summary['sets_per_second']:.2f} sets/s")
+    for stage, seconds in summary["stage_seconds"].items():
+        print(f"  {stage:<12} {seconds * 1000:9.2f} ms/set")
+    return 1 if summary["failed"] else 0
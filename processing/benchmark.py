@@ -0,0 +1,311 @@
+# processing/benchmark.py
+"""Headless benchmark suite for the mixing core.
+
+Usage: python benchmark.py [--suite quick|standard|full] [--sizes 256,1021,800x600]
+                           [--inputs 1,2,4] [--modes magnitude-phase,real-imaginary]
+                           [--regions inner,outer] [--engines full,half] [--repeat N]
+                           [--fft-backend auto|numpy|scipy|pyfftw] [--precision double|single]
+                           [--pad reflect|zero] [--ram-limit SIZE] [--output FILE]
+                           [--compare FILE|COMMIT] [--threshold 0.10]
+
+Every case mixes deterministic synthetic images in a fresh spawned process,
+so peak RSS belongs to that case alone. Caches are cleared before every
+timed run (the spectrum store is never used), so each run pays for its
+forward FFTs. Wall time is the median of the timed runs; allocations are the
+tracemalloc peak of one extra run. Results are written to
+benchmark_results/<commit>.json unless --output is given, and --compare flags
+cases whose time, RSS growth over the post-import baseline or allocations
+grew by more than --threshold (and by more than a small absolute floor)
+against an earlier results file, or the stored results of a commit. Results
+recorded with different options are refused, and a different machine or
+library versions are warned about. The exit status is 1 when any case regressed.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import numpy as np
+from .mixing_core import MixingCore, RealMixingCore
+from .FourierBase import PRECISIONS, DEFAULT_PRECISION, PAD_MODES
+from .spectrum_cache import resize_cache
+from .out_of_core import OutOfCoreMixer, parse_size
+from . import fft_backend
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+ENGINES = {"full": MixingCore, "half": RealMixingCore}
+# Component lists alternate within a mode, the way the GUI pairs them
+MODES = {
+    "magnitude-phase": ("FT Magnitude", "FT Phase"),
+    "real-imaginary": ("FT Real", "FT Imaginary"),
+}
+REGIONS = ("inner", "outer")
+REGION_SIZE = 50
+SUITES = {
+    "quick": {"sizes": ["256", "257", "512", "1021"], "inputs": [1, 2]},
+    "standard": {"sizes": ["256", "257", "512", "1021", "1024", "2048", "2053", "1021x769"], "inputs": [1, 2, 4]},
+    "full": {"sizes": ["256", "257", "512", "1021", "1024", "2048", "2053", "1021x769", "4096", "4099", "8192"],
+             "inputs": [1, 2, 4]},
+}
+RESULTS_DIR = "benchmark_results"
+# (label, value of a result, smallest absolute growth that counts whatever the ratio)
+METRICS = (
+    ("time", lambda result: result["median_ms"], 2.0),
+    ("RSS growth", lambda result: result["peak_rss_mb"] - result["baseline_rss_mb"], 8.0),
+    ("allocations", lambda result: result["alloc_peak_mb"], 1.0),
+)
+IGNORED_OPTIONS = ("repeat",)  # Changes noise, not what is measured
+
+
+def parse_shape(text):
+    """Parse "1024" (square) or "HxW" into (h, w)."""
+    parts = [int(part) for part in text.lower().split("x")]
+    if len(parts) == 1:
+        parts *= 2
+    if len(parts) != 2 or min(parts) <= 0:
+        raise ValueError(f"Invalid size: {text}")
+    return tuple(parts)
+
+
+def synthetic_image(shape, seed):
+    """Deterministic grayscale test image: a few oriented gratings, a soft disc and noise."""
+    h, w = shape
+    rng = np.random.default_rng(seed)
+    y = np.linspace(-1, 1, h, dtype=np.float32)[:, None]
+    x = np.linspace(-1, 1, w, dtype=np.float32)[None, :]
+    image = np.zeros((h, w), dtype=np.float32)
+    for _ in range(3):
+        fy, fx = rng.uniform(2, 40, size=2).astype(np.float32)
+        image += np.sin(fy * y + fx * x + np.float32(rng.uniform(0, np.pi)))
+    image += 2 * ((x - np.float32(rng.uniform(-0.5, 0.5))) ** 2 + y ** 2 < 0.25)
+    image += 0.3 * rng.standard_normal((h, w), dtype=np.float32)
+    image -= image.min()
+    image *= 255 / max(float(image.max()), 1e-6)
+    return image.astype(np.uint8)
+
+
+def case_name(case):
+    h, w = case["shape"]
+    return f"{h}x{w}/{case['inputs']}in/{case['mode']}/{case['region']}/{case['engine']}"
+
+
+def build_cases(sizes, inputs, modes, regions, engines):
+    return [
+        {"shape": parse_shape(size), "inputs": count, "mode": mode, "region": region, "engine": engine}
+        for size in sizes for count in inputs for mode in modes for region in regions for engine in engines
+    ]
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)  # Bytes on macOS, KiB elsewhere
+
+
+def run_case(case, repeat, backend, precision, pad_mode, ram_limit):
+    """Benchmark one case; runs in its own process and returns its measurements."""
+    fft_backend.configure(backend)
+    # Import the FFT libraries first so the baseline includes them, whichever backend the case uses
+    fft_backend.available_backends() if backend == "auto" else fft_backend.get_backend()
+    baseline_rss = _peak_rss_mb()
+    h, w = case["shape"]
+    images = [synthetic_image((h, w), seed) for seed in range(case["inputs"])]
+    pair = MODES[case["mode"]]
+    components = [pair[i % 2] for i in range(case["inputs"])]
+    weights = [1.0 / case["inputs"]] * case["inputs"]
+    core = ENGINES[case["engine"]](precision=precision, pad_mode=pad_mode, store=None, ram_limit=ram_limit)
+
+    def mix_cold():
+        core.cache.clear()
+        resize_cache.clear()
+        start = time.perf_counter()
+        if core.mix(images, components, case["region"], weights, REGION_SIZE) is None:
+            raise ValueError("No valid FT components were mixed.")
+        return time.perf_counter() - start
+
+    mix_cold()  # Warm-up: FFT plans, backend selection for this shape, lazy imports
+    times = []
+    stage_totals = {}
+    for _ in range(repeat):
+        times.append(mix_cold())
+        for stage, seconds in core.stage_times.items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+    peak_rss = _peak_rss_mb()
+    tracemalloc.start()
+    mix_cold()
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_ms": statistics.median(times) * 1000,
+        "min_ms": min(times) * 1000,
+        "max_ms": max(times) * 1000,
+        "peak_rss_mb": peak_rss,
+        "baseline_rss_mb": baseline_rss,
+        "alloc_peak_mb": alloc_peak / 1024 / 1024,
+        "stage_ms": {stage: total * 1000 / repeat for stage, total in stage_totals.items()},
+        "fft_backend": fft_backend.get_backend((h, w)).name,
+    }
+
+
+def skip_reason(case, precision, ram_limit):
+    """Why a case cannot run on this machine, or None."""
+    if ram_limit is not None:
+        return None  # Oversized mixes run out of core
+    try:
+        available = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+    complex_dtype = PRECISIONS[precision or DEFAULT_PRECISION][1]
+    needed = OutOfCoreMixer.in_memory_bytes(case["inputs"], case["shape"], complex_dtype)
+    if needed > 0.8 * available:
+        return f"needs ~{needed / 1024 ** 3:.1f} GiB of {available / 1024 ** 3:.1f} GiB RAM (use --ram-limit)"
+    return None
+
+
+def git_revision(directory=None):
+    """(commit, dirty) of the checkout holding this code, or ("unknown", False) outside git."""
+    directory = directory or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=directory, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=directory,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        return commit, bool(status)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def run_suite(cases, repeat=3, backend="auto", precision=None, pad_mode=None, ram_limit=None):
+    """Run every case in a fresh process; returns {case name: measurements or {"skipped": reason}}."""
+    results = {}
+    context = get_context("spawn")  # Forked children would inherit the parent's peak RSS
+    for index, case in enumerate(cases, 1):
+        name = case_name(case)
+        reason = skip_reason(case, precision, ram_limit)
+        if reason is not None:
+            results[name] = {"skipped": reason}
+            print(f"[{index}/{len(cases)}] {name}: skipped, {reason}")
+            continue
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_case, case, repeat, backend, precision, pad_mode, ram_limit).result()
+        except Exception as e:
+            results[name] = {"error": str(e)}
+            print(f"Error benchmarking {name}: {e}", file=sys.stderr)
+            continue
+        results[name] = result
+        rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/a"
+        print(f"[{index}/{len(cases)}] {name}: {result['median_ms']:.1f} ms, peak RSS {rss}, "
+              f"allocations {result['alloc_peak_mb']:.0f} MB")
+    return results
+
+
+def load_results(reference, results_dir=RESULTS_DIR):
+    """Load a results file by path, or the stored results of a commit."""
+    path = reference if os.path.isfile(reference) else os.path.join(results_dir, f"{reference}.json")
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def differences(baseline, current, section, ignored=()):
+    """Keys of a results file section (options, machine) whose values differ, as "key: old -> new"."""
+    old, new = baseline.get(section, {}), current.get(section, {})
+    return [f"{key}: {old.get(key)} -> {new.get(key)}" for key in sorted(set(old) | set(new))
+            if key not in ignored and old.get(key) != new.get(key)]
+
+
+def compare(baseline, current, threshold):
+    """Return (case, metric, old, new) for every metric that grew by more than threshold and its floor."""
+    regressions = []
+    for name, new in current.items():
+        old = baseline.get(name)
+        if old is None or "median_ms" not in old or "median_ms" not in new:
+            continue
+        for label, value, floor in METRICS:
+            try:
+                old_value, new_value = value(old), value(new)
+            except (KeyError, TypeError):
+                continue  # Not recorded (e.g. RSS on Windows)
+            if new_value - old_value > floor and new_value > old_value * (1 + threshold):
+                regressions.append((name, label, old_value, new_value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the mixing core on synthetic images.")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick", help="preset sizes and input counts")
+    parser.add_argument("--sizes", default=None, help="comma-separated sizes, N or HxW (overrides the suite)")
+    parser.add_argument("--inputs", default=None, help="comma-separated input counts (overrides the suite)")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated component modes")
+    parser.add_argument("--regions", default=",".join(REGIONS), help="comma-separated region types")
+    parser.add_argument("--engines", default="full", help="comma-separated engines (full, half)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--fft-backend", choices=["auto"] + sorted(fft_backend.BACKENDS), default="auto", help="FFT library")
+    parser.add_argument("--precision", choices=sorted(PRECISIONS), default=None, help="float64/complex128 or float32/complex64 processing")
+    parser.add_argument("--pad", choices=sorted(PAD_MODES), default=None, help="pad inputs to FFT-friendly (5-smooth) sizes")
+    parser.add_argument("--ram-limit", type=parse_size, default=None, help="memory ceiling; larger mixes run out of core instead of being skipped")
+    parser.add_argument("--output", default=None, help=f"results file (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="results file or commit to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative growth flagged as a regression")
+    parser.add_argument("--allow-mismatch", action="store_true", help="compare even if the options differ")
+    args = parser.parse_args(argv)
+
+    suite = SUITES[args.suite]
+    sizes = args.sizes.split(",") if args.sizes else suite["sizes"]
+    inputs = [int(count) for count in args.inputs.split(",")] if args.inputs else suite["inputs"]
+    modes, regions, engines = args.modes.split(","), args.regions.split(","), args.engines.split(",")
+    for values, known, label in ((modes, MODES, "mode"), (regions, REGIONS, "region"), (engines, ENGINES, "engine")):
+        for value in values:
+            if value not in known:
+                parser.error(f"unknown {label}: {value}")
+
+    cases = build_cases(sizes, inputs, modes, regions, engines)
+    results = run_suite(cases, repeat=args.repeat, backend=args.fft_backend, precision=args.precision,
+                        pad_mode=args.pad, ram_limit=args.ram_limit)
+
+    commit, dirty = git_revision()
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    current = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "numpy": np.__version__, "cpus": os.cpu_count()},
+        "options": {"repeat": args.repeat, "fft_backend": args.fft_backend, "precision": args.precision,
+                    "pad": args.pad, "ram_limit": args.ram_limit, "region_size": REGION_SIZE},
+        "results": results,
+    }
+    with open(output, "w") as results_file:
+        json.dump(current, results_file, indent=2)
+    print(f"Wrote {len(results)} results to {output}")
+
+    if args.compare is None:
+        return 0
+    baseline = load_results(args.compare)
+    for difference in differences(baseline, current, "machine"):
+        print(f"  WARNING machine differs, {difference}")
+    mismatched = differences(baseline, current, "options", IGNORED_OPTIONS)
+    if mismatched:
+        for difference in mismatched:
+            print(f"  {'WARNING' if args.allow_mismatch else 'ERROR'} options differ, {difference}")
+        if not args.allow_mismatch:
+            print("Refusing to compare results recorded with different options (see --allow-mismatch).")
+            return 2
+    regressions = compare(baseline["results"], results, args.threshold)
+    print(f"Compared with {baseline.get('commit', args.compare)}: {len(regressions)} regressions "
+          f"beyond {args.threshold:.0%}")
+    for name, label, old, new in regressions:
+        print(f"  REGRESSION {name}: {label} {old:.1f} -> {new:.1f} ({new / old - 1:+.0%})")
+    return 1 if regressions else 0
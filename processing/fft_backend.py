@@ -0,0 +1,302 @@
+# processing/fft_backend.py
+"""Pluggable FFT backends.
+
+numpy.fft is always available; scipy.fft (multi-threaded through workers=) and
+pyFFTW (threaded, with wisdom persisted between runs) are used when installed.
+The backend is chosen with configure() or the IMAGE_MIXER_FFT_BACKEND
+environment variable ("auto", "numpy", "scipy" or "pyfftw"). In "auto" mode
+every available backend is benchmarked once per image shape, on a small
+proxy with the same axis lengths, and the fastest one is used for that shape
+from then on. Choices are saved next to the FFTW wisdom, so later runs and
+batch worker processes skip the benchmark.
+"""
+import atexit
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+from .instrumentation import instrumentation
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "image_mixer")
+PROXY_PIXELS = 1 << 18  # Element budget of each benchmark proxy
+
+
+class NumpyFFT:
+    name = "numpy"
+
+    def __init__(self, workers=None):
+        self.workers = 1
+
+    def fft2(self, a):
+        return np.fft.fft2(a)
+
+    def ifft2(self, a):
+        return np.fft.ifft2(a)
+
+    def rfft2(self, a):
+        return np.fft.rfft2(a)
+
+    def irfft2(self, a, s):
+        return np.fft.irfft2(a, s=s)
+
+    def fft(self, a, axis=-1):
+        return np.fft.fft(a, axis=axis)
+
+    def ifft(self, a, axis=-1):
+        return np.fft.ifft(a, axis=axis)
+
+
+class ScipyFFT:
+    name = "scipy"
+
+    def __init__(self, workers=None):
+        import scipy.fft
+        self._fft = scipy.fft
+        self.workers = workers or os.cpu_count() or 1
+
+    def fft2(self, a):
+        return self._fft.fft2(a, workers=_workers(self.workers))
+
+    def ifft2(self, a):
+        return self._fft.ifft2(a, workers=_workers(self.workers))
+
+    def rfft2(self, a):
+        return self._fft.rfft2(a, workers=_workers(self.workers))
+
+    def irfft2(self, a, s):
+        return self._fft.irfft2(a, s=s, workers=_workers(self.workers))
+
+    def fft(self, a, axis=-1):
+        return self._fft.fft(a, axis=axis, workers=_workers(self.workers))
+
+    def ifft(self, a, axis=-1):
+        return self._fft.ifft(a, axis=axis, workers=_workers(self.workers))
+
+
+class PyFFTW:
+    name = "pyfftw"
+    PLANNER_EFFORT = "FFTW_MEASURE"
+
+    def __init__(self, workers=None, wisdom_path=None):
+        import pyfftw
+        import pyfftw.interfaces.numpy_fft
+        self._pyfftw = pyfftw
+        self._fft = pyfftw.interfaces.numpy_fft
+        self.workers = workers or os.cpu_count() or 1
+        self.wisdom_path = wisdom_path or os.path.join(CACHE_DIR, "fftw_wisdom.pickle")
+        # Keep planned FFTW objects alive between calls with the same shape
+        pyfftw.interfaces.cache.enable()
+        self.load_wisdom()
+        atexit.register(self.save_wisdom)
+
+    def load_wisdom(self):
+        try:
+            with open(self.wisdom_path, "rb") as wisdom_file:
+                self._pyfftw.import_wisdom(pickle.load(wisdom_file))
+        except (OSError, pickle.UnpicklingError, ValueError):
+            pass
+
+    def save_wisdom(self):
+        try:
+            os.makedirs(os.path.dirname(self.wisdom_path), exist_ok=True)
+            with open(self.wisdom_path, "wb") as wisdom_file:
+                pickle.dump(self._pyfftw.export_wisdom(), wisdom_file)
+        except OSError as e:
+            print(f"Could not save FFTW wisdom: {e}")
+
+    def _options(self):
+        return {"threads": _workers(self.workers), "planner_effort": self.PLANNER_EFFORT}
+
+    def fft2(self, a):
+        return self._fft.fft2(a, **self._options())
+
+    def ifft2(self, a):
+        return self._fft.ifft2(a, **self._options())
+
+    def rfft2(self, a):
+        return self._fft.rfft2(a, **self._options())
+
+    def irfft2(self, a, s):
+        return self._fft.irfft2(a, s=s, **self._options())
+
+    def fft(self, a, axis=-1):
+        return self._fft.fft(a, axis=axis, **self._options())
+
+    def ifft(self, a, axis=-1):
+        return self._fft.ifft(a, axis=axis, **self._options())
+
+
+BACKENDS = {"numpy": NumpyFFT, "scipy": ScipyFFT, "pyfftw": PyFFTW}
+
+_lock = threading.Lock()
+_config = {"backend": os.environ.get("IMAGE_MIXER_FFT_BACKEND", "auto"), "workers": None, "wisdom_path": None,
+           "choices_path": None}
+_instances = {}
+_local = threading.local()  # Per-thread worker cap set by limit_workers()
+_fastest = {}  # shape -> backend name chosen by the "auto" benchmark
+_saved_choices = None  # Persisted choices of earlier runs, loaded on first use
+
+
+def configure(backend="auto", workers=None, wisdom_path=None, choices_path=None):
+    """Select the FFT backend ("auto" or a name from BACKENDS) and its worker count."""
+    global _saved_choices
+    if backend != "auto" and backend not in BACKENDS:
+        raise ValueError(f"Unknown FFT backend: {backend}")
+    with _lock:
+        _config.update(backend=backend, workers=workers, wisdom_path=wisdom_path, choices_path=choices_path)
+        _instances.clear()
+        _fastest.clear()
+        _saved_choices = None
+
+
+@contextmanager
+def limit_workers(workers):
+    """Cap the threads of every FFT the calling thread runs inside the block; other threads keep the full count."""
+    previous = getattr(_local, "workers", None)
+    _local.workers = workers
+    try:
+        yield
+    finally:
+        _local.workers = previous
+
+
+def _workers(default):
+    limit = getattr(_local, "workers", None)
+    return min(default, limit) if limit else default
+
+
+def available_backends():
+    """Instantiate (once) and return every backend whose library is installed."""
+    backends = []
+    for name in BACKENDS:
+        backend = _instance(name)
+        if backend is not None:
+            backends.append(backend)
+    return backends
+
+
+def _instance(name):
+    if name not in _instances:
+        options = {"workers": _config["workers"]}
+        if name == "pyfftw":
+            options["wisdom_path"] = _config["wisdom_path"]
+        try:
+            _instances[name] = BACKENDS[name](**options)
+        except ImportError:
+            _instances[name] = None
+    return _instances[name]
+
+
+def benchmark(shape, backends=None, repeats=1):
+    """Time forward and inverse FFTs of shape's axis lengths on each backend; returns {name: seconds}.
+
+    A 2D FFT is a pass of 1D FFTs along each axis, and its speed depends on
+    those lengths rather than on the number of lines, so each axis is timed
+    on a strip of at most PROXY_PIXELS elements instead of the full image.
+    """
+    h, w = shape[-2:]
+    rng = np.random.default_rng(0)
+    strips = [(rng.random((h, max(1, min(w, PROXY_PIXELS // h)))), 0),
+              (rng.random((max(1, min(h, PROXY_PIXELS // w)), w)), 1)]
+    timings = {}
+    for backend in backends or available_backends():
+        elapsed = 0.0
+        for strip, axis in strips:
+            backend.ifft(backend.fft(strip, axis=axis), axis=axis)  # Warm-up, also plans FFTW
+            best = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                backend.ifft(backend.fft(strip, axis=axis), axis=axis)
+                best = min(best, time.perf_counter() - start)
+            # Scale each strip up to the full number of lines along the other axis
+            elapsed += best * (w if axis == 0 else h) / strip.shape[1 - axis]
+        timings[backend.name] = elapsed
+    return timings
+
+
+def next_fast_length(n):
+    """Smallest 5-smooth length (2^a * 3^b * 5^c) >= n; every backend transforms these fastest."""
+    candidate = max(1, int(n))
+    while True:
+        remainder = candidate
+        for factor in (2, 3, 5):
+            while remainder % factor == 0:
+                remainder //= factor
+        if remainder == 1:
+            return candidate
+        candidate += 1
+
+
+def _choices_path():
+    return _config["choices_path"] or os.path.join(CACHE_DIR, "fft_backends.json")
+
+
+def _choice_key(shape, backends):
+    """Persisted choices only apply to the same installed backends and worker count."""
+    names = ",".join(backend.name for backend in backends)
+    return f"{names}|{_config['workers'] or os.cpu_count()}|{shape[0]}x{shape[1]}"
+
+
+def _load_choices():
+    try:
+        with open(_choices_path()) as choices_file:
+            return json.load(choices_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_choice(key, name):
+    """Merge one choice into the choices file; concurrent writers lose at most a choice, never the file."""
+    path = _choices_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        choices = _load_choices()
+        choices[key] = name
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(handle, "w") as choices_file:
+            json.dump(choices, choices_file, indent=1)
+        os.replace(temporary, path)
+    except OSError as e:
+        print(f"Could not save FFT backend choices: {e}")
+
+
+def get_backend(shape=None):
+    """Return the configured backend, benchmarking the candidates for shape in "auto" mode."""
+    global _saved_choices
+    with _lock:
+        name = _config["backend"]
+        if name != "auto":
+            backend = _instance(name)
+            if backend is None:
+                raise ImportError(f"FFT backend '{name}' is not installed.")
+            return backend
+        if shape is None:
+            return _instance("numpy")
+        shape = tuple(shape[-2:])
+        if shape in _fastest:
+            return _instance(_fastest[shape])
+        backends = available_backends()
+        key = _choice_key(shape, backends)
+        if _saved_choices is None:
+            _saved_choices = _load_choices()
+        saved = _saved_choices.get(key)
+        if saved is not None and _instance(saved) is not None:
+            _fastest[shape] = saved
+            return _instance(saved)
+
+    # Benchmark without the lock so FFTs of other shapes keep running meanwhile
+    timings = benchmark(shape, backends)
+    fastest = min(timings, key=timings.get)
+    with _lock:
+        if shape in _fastest:
+            return _instance(_fastest[shape])  # Another thread finished its benchmark first
+        _fastest[shape] = fastest
+        if _saved_choices is not None:
+            _saved_choices[key] = fastest
+    _save_choice(key, fastest)
+    instrumentation.event("fft_backend", shape=shape, backend=fastest, timings=timings)
+    return _instance(fastest)
@@ -0,0 +1,85 @@
+# processing/ingest.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from . import fft_backend
+
+
+class IngestPipeline:
+    """Staged decode -> resize -> forward FFT of many inputs on a thread pool.
+
+    cv2 decoding/resizing and the FFT backends release the GIL, so every input
+    runs its stages on its own worker and the stages of different inputs
+    overlap. progress(stage, done, total) is called from the worker threads
+    each time an input finishes a stage. The cores are split between the
+    workers, so each input's FFT runs on cores // workers threads.
+    """
+    STAGES = ("decode", "resize", "fft")
+
+    def __init__(self, engine, max_workers=None, progress=None):
+        self.engine = engine
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.progress = progress
+        self._lock = threading.Lock()
+        self._done = {}
+        self._fft_workers = None
+
+    @staticmethod
+    def decode(path):
+        """Decode an image file as grayscale, raising if it cannot be read."""
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"Failed to load image: {path}")
+        return image
+
+    def run(self, sources, target_shape=None):
+        """Return the shifted spectra of sources (file paths or grayscale arrays).
+
+        target_shape defaults to the shape of the first source, as in the GUI.
+        """
+        total = len(sources)
+        self._done = dict.fromkeys(self.STAGES, 0)
+        workers = min(self.max_workers, max(total, 1))
+        self._fft_workers = max(1, (os.cpu_count() or 1) // workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            decoded = [executor.submit(self._decode, source, total) for source in sources]
+            if target_shape is None and decoded:
+                target_shape = decoded[0].result().shape
+            # Resize and FFT start per input as soon as that input is decoded
+            transformed = [
+                executor.submit(self._transform, future, target_shape, total) for future in decoded
+            ]
+            return [future.result() for future in transformed]
+
+    def _decode(self, source, total):
+        if isinstance(source, (str, os.PathLike)):
+            # Files known to the spectrum store are not decoded unless their spectrum is missing
+            store = self.engine.store
+            image = store.open_image(os.fspath(source)) if store is not None else self.decode(source)
+        else:
+            image = source
+        self._report("decode", total)
+        return image
+
+    def _transform(self, decoded, target_shape, total):
+        image = decoded.result()
+        key = self.engine.spectrum_key(image, target_shape)
+        spectrum = self.engine.cached_spectrum(key)
+        if spectrum is None:
+            image = self.engine.prepare_input(image, target_shape, key)
+            self._report("resize", total)
+            with fft_backend.limit_workers(self._fft_workers):
+                spectrum = self.engine.compute_fft(image.astype(self.engine.real_dtype))
+            spectrum = self.engine.remember_spectrum(key, spectrum)
+        else:
+            self._report("resize", total)
+        self._report("fft", total)
+        return spectrum
+
+    def _report(self, stage, total):
+        with self._lock:
+            self._done[stage] += 1
+            done = self._done[stage]
+        if self.progress is not None:
+            self.progress(stage, done, total)
@@ -0,0 +1,178 @@
+# processing/instrumentation.py
+"""Span timing for the mixing pipeline and the GUI.
+
+Code wraps its stages in ``with instrumentation.span("fft"):``. While
+instrumentation is disabled span() returns a shared no-op context, so a
+span costs one attribute check. While enabled every span is aggregated into
+a per-name histogram (log2 microsecond buckets plus a bounded sample window
+for percentiles) and kept in a bounded event buffer that can be exported as
+a summary JSON or a Chrome trace (chrome://tracing, Perfetto). event()
+records instant events in place of informational prints.
+
+IMAGE_MIXER_PROFILE=1 enables it at startup; IMAGE_MIXER_TRACE=path also
+exports a Chrome trace (or a summary, for paths ending in .summary.json)
+when the process exits.
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+BUCKETS = 32  # Bucket i counts spans of [2^i, 2^(i+1)) microseconds
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("owner", "name", "args", "start")
+
+    def __init__(self, owner, name, args):
+        self.owner = owner
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.owner.record(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class Histogram:
+    """Count, total, extremes, log2 buckets and a window of recent samples of one span name."""
+
+    def __init__(self, max_samples):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = 0.0
+        self.buckets = [0] * BUCKETS
+        self.samples = deque(maxlen=max_samples)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.minimum = min(self.minimum, seconds)
+        self.maximum = max(self.maximum, seconds)
+        microseconds = int(seconds * 1e6)
+        self.buckets[min(BUCKETS - 1, microseconds.bit_length() - 1 if microseconds else 0)] += 1
+        self.samples.append(seconds)
+
+    def percentile(self, fraction):
+        """Nearest-rank percentile: the smallest sample with at least fraction of the samples at or below it."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+    def summary(self):
+        """Milliseconds per statistic; percentiles cover the most recent samples."""
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "min_ms": self.minimum * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "max_ms": self.maximum * 1000,
+            "buckets_us": {f"{1 << i}": count for i, count in enumerate(self.buckets) if count},
+        }
+
+
+class Instrumentation:
+    """Process-wide span recorder; see the module docstring."""
+
+    def __init__(self, enabled=False, max_events=100000, max_samples=4096):
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self.histograms = {}
+        self.events = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls):
+        trace_path = os.environ.get("IMAGE_MIXER_TRACE")
+        instrumentation = cls(enabled=bool(os.environ.get("IMAGE_MIXER_PROFILE")) or bool(trace_path))
+        if trace_path:
+            if trace_path.endswith(".summary.json"):
+                atexit.register(instrumentation.export_summary, trace_path)
+            else:
+                atexit.register(instrumentation.export_chrome_trace, trace_path)
+        return instrumentation
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def span(self, name, **args):
+        """Context manager timing one span; a shared no-op while disabled."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def record(self, name, start, end, args=None):
+        """Add a finished span (perf_counter start/end) to its histogram and the event buffer."""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.max_samples)
+            histogram.add(end - start)
+            self.events.append(("X", name, start, end - start, threading.get_ident(), args))
+
+    def event(self, name, **args):
+        """Record an instant event (what used to be an informational print)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.events.append(("i", name, time.perf_counter(), 0.0, threading.get_ident(), args))
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.events.clear()
+            self.origin = time.perf_counter()
+
+    def summary(self):
+        """{span name: statistics} of everything recorded since the last reset."""
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def export_summary(self, path):
+        with open(path, "w") as summary_file:
+            json.dump(self.summary(), summary_file, indent=2)
+
+    def export_chrome_trace(self, path):
+        """Write the event buffer in the Chrome trace event format."""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+        trace = []
+        for phase, name, start, duration, thread, args in events:
+            event = {"name": name, "ph": phase, "ts": (start - self.origin) * 1e6, "pid": pid, "tid": thread}
+            if phase == "X":
+                event["dur"] = duration * 1e6
+            else:
+                event["s"] = "t"
+            if args:
+                event["args"] = {key: str(value) for key, value in args.items()}
+            trace.append(event)
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, trace_file)
+
+
+# Shared by the processing pipeline and the GUI
+instrumentation = Instrumentation.from_environment()
@@ -0,0 +1,61 @@
+# processing/live_mixer.py
+import numpy as np
+from .FourierBase import FourierBase
+
+
+class LiveMixer:
+    """Weight-only remixing from cached per-input spatial contributions.
+
+    Region masking and the inverse FFT are linear, so
+    inverse_fft(mask(sum w_i * F_i)) == sum w_i * inverse_fft(mask(F_i)).
+    prepare() pays for one batched inverse FFT over the inputs; remix() is then
+    an N-term weighted sum with no FFTs. Both component modes rebuild each
+    input's own spectrum, so the same contributions serve Magnitude/Phase and
+    Real/Imaginary mixes.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine or FourierBase()
+        self.contributions = None
+        self.slots = []
+        self._buffer = None
+
+    @property
+    def is_ready(self):
+        return self.contributions is not None
+
+    def invalidate(self):
+        """Drop the cached contributions; call whenever inputs, components or the region change."""
+        self.contributions = None
+        self.slots = []
+        self._buffer = None
+
+    def prepare(self, images, components, region_type, region_size, target_shape=None):
+        """Compute and cache the masked spatial contribution of every valid input."""
+        self.invalidate()
+        valid = [
+            i for i, (image, component_type) in enumerate(zip(images, components))
+            if image is not None and component_type in self.engine.COMPONENT_TYPES
+        ]
+        if not valid:
+            print("No valid FT components available for live mixing.")
+            return False
+        if target_shape is None:
+            target_shape = images[valid[0]].shape
+        spectra = self.engine.get_spectra([images[i] for i in valid], target_shape)
+        # One (N, h, w) stack so masking and the inverse FFT each run once for all inputs
+        stack = np.stack(spectra)
+        self.engine.mask_spectrum(stack, target_shape, region_type, region_size)
+        self.contributions = self.engine.inverse_fft(stack, target_shape)
+        self.slots = valid
+        self._buffer = np.empty(self.contributions.shape[1:], dtype=self.contributions.dtype)
+        return True
+
+    def remix(self, weights):
+        """Return the uint8 mix for the given per-input weights (one per input passed to prepare)."""
+        if not self.is_ready:
+            raise RuntimeError("LiveMixer.prepare must be called before remix.")
+        weights = np.asarray([weights[i] for i in self.slots], dtype=self._buffer.dtype)
+        np.einsum('n,nhw->hw', weights, self.contributions, out=self._buffer)
+        np.clip(self._buffer, 0, 255, out=self._buffer)
+        return self._buffer.astype(np.uint8)
@@ -0,0 +1,273 @@
+# processing/mixing_core.py
+import time
+import cv2
+import numpy as np
+from .FourierBase import FourierBase
+from .RealFourierBase import RealFourierBase
+from .mixing_kernel import accumulate_spectra
+from .region_masks import region_masks
+from .ingest import IngestPipeline
+from .shared_pool import SharedMemoryMixer
+from .out_of_core import OutOfCoreMixer
+from .instrumentation import instrumentation
+
+
+RESIZE_POLICIES = ("first", "largest")
+
+
+def parse_resize_policy(text):
+    """Parse "first", "largest" or a fixed "HxW" size (e.g. "1024x768") into a resize policy."""
+    text = text.strip().lower()
+    if text in RESIZE_POLICIES:
+        return text
+    try:
+        h, w = (int(part) for part in text.split("x"))
+    except ValueError:
+        raise ValueError(f"Unknown resize policy: {text}") from None
+    if h <= 0 or w <= 0:
+        raise ValueError(f"Invalid fixed size: {text}")
+    return h, w
+
+
+class MixingCore(FourierBase):
+    """Qt-free mixing pipeline shared by ImageProcessor and the headless batch mixer.
+
+    stage_times holds the wall time in seconds of every stage of the last mix.
+    With ingest_workers set, resizing and forward FFTs run per input on an
+    IngestPipeline thread pool instead of as one batched FFT. With processes
+    set, the whole mix runs on a SharedMemoryMixer process pool instead.
+    With preview_size set, inputs whose long side exceeds it are first mixed at
+    that size and handed to report_preview before the full-resolution mix.
+    resize_policy picks the shape every input is resized to: the first loaded
+    input ("first"), the largest one by area ("largest") or a fixed (h, w).
+    With ram_limit set (bytes), mixes whose in-memory working set would exceed
+    it run on an OutOfCoreMixer over memory-mapped scratch files instead.
+    """
+
+    def __init__(self, *args, ingest_workers=None, processes=None, preview_size=None, resize_policy="first",
+                 ram_limit=None, **kwargs):
+        FourierBase.__init__(self, *args, **kwargs)
+        if resize_policy not in RESIZE_POLICIES and not isinstance(resize_policy, tuple):
+            raise ValueError(f"Unknown resize policy: {resize_policy}")
+        self.resize_policy = resize_policy
+        self.ram_limit = ram_limit
+        self.ingest_workers = ingest_workers
+        self.processes = processes
+        self.preview_size = preview_size
+        self.shared_mixer = None
+        self.stage_times = {}
+
+    def target_shape(self, images):
+        """Shape every input is resized to, chosen by resize_policy."""
+        loaded = [image for image in images if image is not None]
+        if not loaded:
+            raise ValueError("No valid images provided for processing.")
+        if isinstance(self.resize_policy, tuple):
+            return self.resize_policy
+        if self.resize_policy == "largest":
+            return max(loaded, key=lambda image: image.shape[0] * image.shape[1]).shape
+        return loaded[0].shape
+
+    def exceeds_ram_limit(self, count, target_shape):
+        """True when mixing count inputs at target_shape in memory would need more than ram_limit bytes."""
+        return bool(self.ram_limit) and OutOfCoreMixer.in_memory_bytes(
+            count, self.working_shape(target_shape), self.complex_dtype) > self.ram_limit
+
+    def cancelled(self):
+        """Checked between pipeline stages; a cancelled mix returns None."""
+        return False
+
+    def report_progress(self, value):
+        """Called with a percentage as the pipeline advances."""
+
+    def report_stage(self, stage, done, total):
+        """Called (possibly from ingest threads) when an input finishes an ingest stage."""
+
+    def report_preview(self, previews):
+        """Called with the low-resolution previews (one per spec) of a progressive mix."""
+
+    def preview_shape(self, target_shape):
+        """Shape with the long side scaled to preview_size, keeping the aspect ratio."""
+        h, w = target_shape[:2]
+        scale = self.preview_size / max(h, w)
+        return max(1, int(round(h * scale))), max(1, int(round(w * scale)))
+
+    def mix(self, images, components, region, weights, region_size):
+        """Mix the inputs and return the uint8 result, or None if cancelled or nothing was mixable."""
+        spec = {"components": components, "weights": weights, "region": region, "region_size": region_size}
+        with instrumentation.span("mix", inputs=len(images)):
+            results = self.mix_many(images, [spec])
+        return results[0] if results else None
+
+    def select_inputs(self, images, components, weights):
+        """Return (input index, weight) for every loaded input with a valid component."""
+        selection = []
+        for i, (image, component_type, weight) in enumerate(zip(images, components, weights)):
+            if image is None:
+                instrumentation.event("skip_input", input=i + 1)
+                continue
+            # Every component pair rebuilds the input's own spectrum, so only the type is validated here
+            if component_type not in self.COMPONENT_TYPES:
+                print(f"Error combining FT components for viewer {i}: Unknown component type: {component_type}")
+                continue
+            selection.append((i, weight))
+        return selection
+
+    def mix_many(self, images, specs):
+        """Mix several specifications of the same inputs in one pass.
+
+        Each spec is a dict with "components", "weights", "region" and
+        "region_size" (extra keys are ignored). Ingest and forward FFTs are
+        shared; every spec only adds its own accumulation, mask and inverse FFT.
+        Returns one uint8 image per spec (None where nothing was mixable), or
+        None if cancelled.
+        """
+        self.stage_times = {}
+        target_shape = self.target_shape(images)
+        instrumentation.event("target_shape", shape=target_shape)
+        selections = [self.select_inputs(images, spec["components"], spec["weights"]) for spec in specs]
+        needed = sorted({i for selection in selections for i, _ in selection})
+        if not needed:
+            print("No valid FT components were mixed.")
+            return [None] * len(specs)
+        if self.cancelled():
+            return None
+
+        if self.preview_size and max(target_shape[:2]) > self.preview_size:
+            previews = [
+                self.mix_preview([images[i] for i, _ in selection], [w for _, w in selection],
+                                 spec["region"], spec["region_size"], target_shape) if selection else None
+                for spec, selection in zip(specs, selections)
+            ]
+            self.report_preview(previews)
+            if self.cancelled():
+                return None
+
+        if self.processes:
+            return [
+                self.mix_shared([images[i] for i, _ in selection], [w for _, w in selection],
+                                spec["region"], spec["region_size"], target_shape) if selection else None
+                for spec, selection in zip(specs, selections)
+            ]
+
+        if self.exceeds_ram_limit(len(needed), target_shape):
+            instrumentation.event("out_of_core", ram_limit=self.ram_limit)
+            results = []
+            for spec, selection in zip(specs, selections):
+                if self.cancelled():
+                    return None
+                results.append(self.mix_out_of_core([images[i] for i, _ in selection], [w for _, w in selection],
+                                                    spec["region"], spec["region_size"], target_shape)
+                               if selection else None)
+            return results
+
+        start = time.perf_counter()
+        if self.ingest_workers:
+            ingest = IngestPipeline(self, self.ingest_workers, progress=self.report_stage)
+            spectra = ingest.run([images[i] for i in needed], target_shape)
+        else:
+            # One batched forward FFT for every input missing from the spectrum cache
+            spectra = self.get_spectra([images[i] for i in needed], target_shape)
+        self.stage_times["spectra"] = time.perf_counter() - start
+        instrumentation.event("spectra_ready", ready=len(spectra), inputs=len(images))
+        self.report_progress(50)
+        # A fresh (N, h, w) batch lets a spec using every input in order accumulate with one einsum
+        batch = spectra if isinstance(spectra, np.ndarray) else None
+        spectra = dict(zip(needed, spectra))
+
+        results = []
+        for spec, selection in zip(specs, selections):
+            if self.cancelled():
+                return None
+            if not selection:
+                print("No valid FT components were mixed.")
+                results.append(None)
+                continue
+            indices = [i for i, _ in selection]
+            inputs = batch if batch is not None and indices == needed else [spectra[i] for i in indices]
+            results.append(self.finish_mix(inputs, [w for _, w in selection],
+                                           spec["region"], spec["region_size"], target_shape))
+        return results
+
+    def finish_mix(self, spectra, weights, region, region_size, target_shape):
+        """Accumulate, mask and invert one spec's spectra into a uint8 image, or None if cancelled."""
+        start = time.perf_counter()
+        mixed_ft = accumulate_spectra(spectra, weights)
+        self._add_time("accumulate", start)
+        start = time.perf_counter()
+        self.mask_spectrum(mixed_ft, target_shape, region.lower(), region_size)
+        self._add_time("mask", start)
+        if self.cancelled():
+            return None
+
+        # Apply inverse FFT to get the result
+        start = time.perf_counter()
+        mixed_image = self.inverse_fft(mixed_ft, target_shape)
+        self._add_time("inverse_fft", start)
+        start = time.perf_counter()
+        mixed_image = np.clip(mixed_image, 0, 255).astype(np.uint8)  # Ensure valid range
+        self._add_time("clip", start)
+        return mixed_image
+
+    def _add_time(self, stage, start):
+        self.stage_times[stage] = self.stage_times.get(stage, 0.0) + time.perf_counter() - start
+
+    def mix_preview(self, images, weights, region, region_size, target_shape):
+        """Mix area-downsampled inputs at preview_shape(target_shape).
+
+        Bin k of both spectra is the same spatial frequency (k cycles per image),
+        so the region size is rescaled to keep the full-resolution region's size
+        in bins; parts beyond the preview's spectrum are simply clamped away.
+        """
+        start = time.perf_counter()
+        h, w = self.preview_shape(target_shape)
+        small = [cv2.resize(np.asarray(image), (w, h), interpolation=cv2.INTER_AREA) for image in images]
+        spectra = self.get_spectra(small, (h, w))
+        mixed_ft = accumulate_spectra(spectra, weights)
+        full_bins = int(min(target_shape[:2]) * region_size / 100)
+        self.mask_spectrum(mixed_ft, (h, w), region.lower(), 100.0 * full_bins / min(h, w))
+        preview = np.clip(self.inverse_fft(mixed_ft, (h, w)), 0, 255).astype(np.uint8)
+        self._add_time("preview", start)
+        return preview
+
+    def mix_shared(self, images, weights, region, region_size, target_shape):
+        """Mix on the shared-memory process pool; the result is backed by shared memory."""
+        if self.shared_mixer is None:
+            self.shared_mixer = SharedMemoryMixer(self.processes, self.spectrum_kind, self.precision, self.pad_mode)
+        start = time.perf_counter()
+        mixed_image = self.shared_mixer.mix(images, weights, region.lower(), region_size, target_shape, self.cancelled)
+        self._add_time("shared_pool", start)
+        self.report_progress(50)
+        return mixed_image
+
+    def mix_out_of_core(self, images, weights, region, region_size, target_shape):
+        """Mix within ram_limit bytes through row/column passes over scratch files."""
+        start = time.perf_counter()
+        mixer = OutOfCoreMixer(self.ram_limit, precision=self.precision, pad_mode=self.pad_mode)
+        mixed_image = mixer.mix(images, weights, region.lower(), region_size, target_shape, cancelled=self.cancelled)
+        self._add_time("out_of_core", start)
+        self.report_progress(50)
+        return mixed_image
+
+    def region_mask(self, shape, region_size_percentage, region_type='inner'):
+        """Return the memoized region mask over a full shifted spectrum of the given shape."""
+        return region_masks.mask(shape, region_type, region_size_percentage)
+
+    def apply_region(self, complex_ft, region_size_percentage, region_type='inner', shape=None):
+        """Apply region selection to the complex FT based on the region type and size.
+
+        shape is the (h, w) of the full spectrum the region is defined on; it
+        defaults to the FT's own shape. The input is left untouched.
+        """
+        try:
+            shape = shape if shape is not None else complex_ft.shape
+            masked = self.mask_spectrum(np.array(complex_ft, dtype=self.complex_dtype), shape, region_type, region_size_percentage)
+            instrumentation.event("apply_region", region=region_type, size=region_size_percentage)
+            return masked
+        except Exception as e:
+            print(f"Error applying region mask: {e}")
+            return complex_ft
+
+
+class RealMixingCore(MixingCore, RealFourierBase):
+    """MixingCore running on the rfft2 half-spectrum engine."""
@@ -0,0 +1,107 @@
+# processing/mixing_worker.py
+import threading
+import time
+from PyQt5.QtCore import pyqtSignal
+from .image_processor import ImageProcessor
+from .instrumentation import instrumentation
+
+
+class MixingWorker(ImageProcessor):
+    """Long-lived mixing thread fed through a latest-request-wins queue.
+
+    submit() never blocks: it replaces any pending request with the newest
+    parameters, and a request that is already running is cancelled at its next
+    pipeline stage. latency reports, in milliseconds, the time from submit()
+    to the result of every request that completes. Specs passed to
+    submit_many() come back tagged with their request's "generation", so
+    results of a superseded request that were already queued can be dropped.
+
+    submit_task() runs other heavy GUI work (e.g. preparing a LiveMixer) on
+    the same thread, ahead of any pending mix; a newer task replaces a pending
+    one, and the return value arrives through task_done with the task's key.
+    """
+    latency = pyqtSignal(float)
+    task_done = pyqtSignal(object, object)  # key, task result (None if it failed)
+
+    def __init__(self, precision=None, ingest_workers=None, processes=None, preview_size=None, pad_mode=None,
+                 resize_policy="first", ram_limit=None):
+        super().__init__([], [], "Inner", [], 50, precision=precision, ingest_workers=ingest_workers,
+                         processes=processes, preview_size=preview_size, pad_mode=pad_mode,
+                         resize_policy=resize_policy, ram_limit=ram_limit)
+        self._condition = threading.Condition()
+        self._pending = None
+        self._pending_task = None
+        self._generation = 0
+        self._active_generation = 0
+        self._stopped = False
+
+    def submit(self, images, components, region, weights, region_size):
+        """Queue a mix, superseding any pending or running request."""
+        with self._condition:
+            self._generation += 1
+            self._pending = ((images, components, region, weights, region_size), None, time.perf_counter())
+            self._condition.notify()
+
+    def submit_many(self, images, specs):
+        """Queue several mix specs of the same inputs; their results arrive together through results."""
+        with self._condition:
+            self._generation += 1
+            specs = [dict(spec, generation=self._generation) for spec in specs]
+            first = specs[0]
+            params = (images, first["components"], first["region"], first["weights"], first["region_size"])
+            self._pending = (params, specs, time.perf_counter())
+            self._condition.notify()
+
+    def supersede(self):
+        """Drop the pending mix and cancel the running one; returns the generation later requests start at."""
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+            return self._generation
+
+    def submit_task(self, key, task):
+        """Run task() on the worker thread and emit task_done(key, result), replacing any pending task."""
+        with self._condition:
+            self._pending_task = (key, task)
+            self._condition.notify()
+
+    def stop(self):
+        """Ask the worker to exit after its current stage; pair with wait() on shutdown."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def cancelled(self):
+        return self._stopped or self._generation != self._active_generation
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and self._pending_task is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    if self.shared_mixer is not None:
+                        self.shared_mixer.shutdown()
+                    return
+                task, self._pending_task = self._pending_task, None
+                if task is None:
+                    (params, specs, submitted), self._pending = self._pending, None
+                    self._active_generation = self._generation
+            if task is not None:
+                self.run_task(*task)
+                continue
+            self.images, self.components, self.region, self.weights, self.region_size = params
+            self.specs = specs
+            ImageProcessor.run(self)
+            if not self.cancelled():
+                finished = time.perf_counter()
+                instrumentation.record("request", submitted, finished)
+                self.latency.emit((finished - submitted) * 1000)
+
+    def run_task(self, key, task):
+        try:
+            result = task()
+        except Exception as e:
+            print(f"Error running background task {key}: {e}")
+            result = None
+        self.task_done.emit(key, result)
@@ -0,0 +1,145 @@
+# processing/out_of_core.py
+"""Out-of-core mixing for inputs whose spectra do not fit in memory.
+
+Mixing is linear, so sum(w_i * FFT2(x_i)) == FFT2(sum(w_i * x_i)) and the
+mix needs a single complex scratch array instead of one spectrum per input.
+That array lives in a memory-mapped scratch file and the 2D FFT runs as
+separate passes, each over tiles sized to stay within the RAM ceiling:
+
+1. row bands: weighted sum of the inputs, FFT along x, written to scratch;
+2. column bands: FFT along y, region mask, inverse FFT along y, in place;
+3. row bands: inverse FFT along x, real part clipped to the uint8 output.
+
+Inputs that need resizing or padding are resized one at a time into uint8
+scratch files first; that step is the only one that holds a whole image.
+With a pad mode the passes run over the padded working shape, exactly like
+the in-memory engines, and pass 3 crops the result back.
+"""
+import os
+import re
+import tempfile
+import cv2
+import numpy as np
+from .FourierBase import PRECISIONS, DEFAULT_PRECISION, PAD_MODES
+from .region_masks import region_masks
+from . import fft_backend
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(text):
+    """Parse a byte count such as "512M", "4G" or "1073741824"."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*", str(text).upper())
+    if match is None:
+        raise ValueError(f"Invalid size: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+class OutOfCoreMixer:
+    """Streamed row/column-pass mixer bounded by ram_bytes of working memory."""
+
+    def __init__(self, ram_bytes, scratch_dir=None, precision=None, pad_mode=None):
+        if pad_mode is not None and pad_mode not in PAD_MODES:
+            raise ValueError(f"Unknown pad mode: {pad_mode}")
+        self.ram_bytes = ram_bytes
+        self.pad_mode = pad_mode
+        self.scratch_dir = scratch_dir or tempfile.gettempdir()
+        self.precision = precision or DEFAULT_PRECISION
+        self.real_dtype, self.complex_dtype = (np.dtype(dtype) for dtype in PRECISIONS[self.precision])
+
+    @staticmethod
+    def in_memory_bytes(count, shape, complex_dtype):
+        """Rough peak working set of the in-memory path at its working shape: a real stack plus batched and mixed spectra."""
+        h, w = shape[:2]
+        itemsize = np.dtype(complex_dtype).itemsize
+        return h * w * (count * (itemsize // 2 + itemsize) + 2 * itemsize)
+
+    def band(self, length, bytes_per_line):
+        """Lines per tile so one tile's buffers stay within ram_bytes."""
+        return int(max(1, min(length, self.ram_bytes // max(1, bytes_per_line))))
+
+    def working_shape(self, shape):
+        """Padded (h, w) the passes run at, matching FourierBase.working_shape."""
+        h, w = shape[:2]
+        if self.pad_mode is None:
+            return h, w
+        return fft_backend.next_fast_length(h), fft_backend.next_fast_length(w)
+
+    def mix(self, images, weights, region_type, region_size, target_shape, output=None, cancelled=None):
+        """Mix images resized to target_shape into output (a new uint8 array by default), or None if cancelled."""
+        content_h, content_w = target_shape[:2]
+        h, w = self.working_shape(target_shape)
+        if output is None:
+            output = np.empty((content_h, content_w), dtype=np.uint8)
+        backend = fft_backend.get_backend((h, w))  # The auto benchmark only times small proxies
+        scratch_files = []
+        try:
+            sources = [self._row_source(image, (content_h, content_w), scratch_files) for image in images]
+            spectrum = self._scratch((h, w), self.complex_dtype, scratch_files)
+            itemsize = self.complex_dtype.itemsize
+
+            # Pass 1: weighted spatial sum and FFT along x, one row band at a time
+            rows = self.band(h, w * (self.real_dtype.itemsize + 2 * itemsize))
+            weights = [self.real_dtype.type(weight) for weight in weights]
+            for top in range(0, h, rows):
+                if cancelled is not None and cancelled():
+                    return None
+                bottom = min(h, top + rows)
+                accumulated = np.zeros((bottom - top, w), dtype=self.real_dtype)
+                for source, weight in zip(sources, weights):
+                    accumulated += weight * source[top:bottom].astype(self.real_dtype)
+                spectrum[top:bottom] = backend.fft(accumulated, axis=1)
+
+            # Pass 2: FFT along y, region mask in shifted coordinates, inverse FFT along y
+            cols = self.band(w, h * 3 * itemsize)
+            # Unshifted bin k sits at shifted index (k + n // 2) % n
+            shifted_rows = (np.arange(h) + h // 2) % h
+            for left in range(0, w, cols):
+                if cancelled is not None and cancelled():
+                    return None
+                right = min(w, left + cols)
+                tile = backend.fft(np.asarray(spectrum[:, left:right]), axis=0).astype(self.complex_dtype, copy=False)
+                if region_type:
+                    shifted_cols = (np.arange(left, right) + w // 2) % w
+                    tile *= region_masks.mask_block((h, w), region_type, region_size, shifted_rows, shifted_cols,
+                                                    dtype=self.real_dtype, content_shape=(content_h, content_w))
+                spectrum[:, left:right] = backend.ifft(tile, axis=0)
+                del tile
+
+            # Pass 3: inverse FFT along x, keep the real part of the content, quantize into the output
+            for top in range(0, content_h, rows):
+                if cancelled is not None and cancelled():
+                    return None
+                bottom = min(content_h, top + rows)
+                band = backend.ifft(np.asarray(spectrum[top:bottom]), axis=1).real
+                output[top:bottom] = np.clip(band[:, :content_w], 0, 255)
+            del spectrum, sources
+            return output
+        finally:
+            for path in scratch_files:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Error removing scratch file {path}: {e}")
+
+    def _scratch(self, shape, dtype, scratch_files):
+        handle, path = tempfile.mkstemp(dir=self.scratch_dir, suffix=".scratch")
+        os.close(handle)
+        scratch_files.append(path)
+        return np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+
+    def _row_source(self, image, shape, scratch_files):
+        """An array of the working shape of shape that can be read in row bands without loading it whole."""
+        working = self.working_shape(shape)
+        if isinstance(image, np.ndarray) and image.shape[:2] == shape == working:
+            return image
+        h, w = shape
+        resized = np.asarray(image)
+        if resized.shape[:2] != shape:
+            resized = cv2.resize(resized, (w, h))
+        if working != shape:
+            # Same top-left placement and border as FourierBase.prepare_input
+            resized = cv2.copyMakeBorder(resized, 0, working[0] - h, 0, working[1] - w, PAD_MODES[self.pad_mode], value=0)
+        source = self._scratch(working, resized.dtype, scratch_files)
+        source[...] = resized
+        return source
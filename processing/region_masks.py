@@ -0,0 +1,177 @@
+# processing/region_masks.py
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class RegionMasks:
+    """Memoized frequency-region masks over the full shifted spectrum.
+
+    Masks are keyed by (shape, region_type, region_size). region_size is a
+    percentage of min(h, w): the side of the square for 'inner'/'outer', the
+    diameter for 'circle', the (inner, outer) diameter pair for 'annulus' and
+    twice the standard deviation for 'gaussian'. The rectangular types are
+    applied by zeroing slices in place, so they never need a mask at all.
+
+    When the spectrum was computed on padded inputs, content_shape is the
+    (h, w) of the unpadded content: regions are laid out on the content's
+    spectrum and every padded bin takes the value of the content bin with the
+    nearest spatial frequency, so the same frequencies are kept.
+    """
+    RECTANGULAR = ("inner", "outer")
+    RADIAL = ("circle", "annulus", "gaussian")
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def memoize(self, key, build):
+        """Return the entry for key, building and storing it (read-only) on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        value = build()
+        value.flags.writeable = False
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def radial_grid(self, shape):
+        """Distance of every bin from the zero-frequency bin of a shifted spectrum."""
+        h, w = shape[:2]
+
+        def build():
+            rows = (np.arange(h) - h // 2).astype(np.float64)
+            cols = (np.arange(w) - w // 2).astype(np.float64)
+            return np.hypot(rows[:, None], cols[None, :])
+        return self.memoize(("radial", h, w), build)
+
+    @staticmethod
+    def frequency_map(length, content_length):
+        """Index of the content bin nearest in frequency to every bin of a longer shifted axis."""
+        offsets = np.round((np.arange(length) - length // 2) * content_length / length).astype(np.intp)
+        return np.clip(offsets + content_length // 2, 0, content_length - 1)
+
+    @classmethod
+    def rectangle_bounds(cls, shape, region_size, content_shape=None):
+        """(top, bottom, left, right) of the inner rectangle of a region on a shifted spectrum."""
+        h, w = shape[:2]
+        content_h, content_w = (content_shape or shape)[:2]
+        size = int(min(content_h, content_w) * region_size / 100)
+        # Sizes above 100% (previews of larger spectra) are clamped per axis
+        top, bottom = max(0, (content_h - size) // 2), min(content_h, (content_h + size) // 2)
+        left, right = max(0, (content_w - size) // 2), min(content_w, (content_w + size) // 2)
+        if (h, w) != (content_h, content_w):
+            # The frequency maps are monotonic, so the kept bins stay one contiguous block
+            rows, cols = cls.frequency_map(h, content_h), cls.frequency_map(w, content_w)
+            top, bottom = np.searchsorted(rows, [top, bottom])
+            left, right = np.searchsorted(cols, [left, right])
+        return int(top), int(bottom), int(left), int(right)
+
+    @classmethod
+    def rectangle_slices(cls, shape, region_type, region_size, content_shape=None):
+        """Index tuples of the bins a rectangular region zeroes, valid for (..., h, w) arrays."""
+        top, bottom, left, right = cls.rectangle_bounds(shape, region_size, content_shape)
+        everything = slice(None)
+        if region_type == 'inner':
+            return (
+                (Ellipsis, slice(None, top), everything),
+                (Ellipsis, slice(bottom, None), everything),
+                (Ellipsis, everything, slice(None, left)),
+                (Ellipsis, everything, slice(right, None)),
+            )
+        if region_type == 'outer':
+            return (
+                (Ellipsis, slice(top, bottom), everything),
+                (Ellipsis, everything, slice(left, right)),
+            )
+        raise ValueError(f"Unknown rectangular region type: {region_type}")
+
+    def mask(self, shape, region_type, region_size, dtype=np.float64, content_shape=None):
+        """Return the memoized mask (boolean, or dtype for 'gaussian') for a region."""
+        h, w = shape[:2]
+        if isinstance(region_size, list):
+            region_size = tuple(region_size)
+        key = ((h, w), region_type, region_size)
+        if region_type == 'gaussian':
+            key += (np.dtype(dtype).str,)
+        if content_shape is not None and tuple(content_shape[:2]) != (h, w):
+            content_h, content_w = content_shape[:2]
+            key += ((content_h, content_w),)
+            return self.memoize(key, lambda: self.mask((content_h, content_w), region_type, region_size, dtype)[
+                np.ix_(self.frequency_map(h, content_h), self.frequency_map(w, content_w))])
+
+        def build():
+            if region_type in self.RECTANGULAR:
+                mask = np.ones((h, w), dtype=bool)
+                for index in self.rectangle_slices((h, w), region_type, region_size):
+                    mask[index] = False
+                return mask
+            return self.radial_mask(self.radial_grid((h, w)), (h, w), region_type, region_size, dtype)
+        return self.memoize(key, build)
+
+    def mask_block(self, shape, region_type, region_size, rows, cols, dtype=np.float64, content_shape=None):
+        """Unmemoized mask of the bins rows x cols (shifted indices) of a full (h, w) spectrum.
+
+        Out-of-core mixing builds the mask tile by tile this way, so the whole
+        (h, w) mask never has to exist at once. With a content_shape the region
+        is laid out on it and mapped onto the padded spectrum, as in mask().
+        """
+        h, w = shape[:2]
+        if content_shape is not None and tuple(content_shape[:2]) != (h, w):
+            content_h, content_w = content_shape[:2]
+            rows = self.frequency_map(h, content_h)[np.asarray(rows)]
+            cols = self.frequency_map(w, content_w)[np.asarray(cols)]
+            h, w = content_h, content_w
+        rows, cols = np.asarray(rows)[:, None], np.asarray(cols)[None, :]
+        if region_type in self.RECTANGULAR:
+            top, bottom, left, right = self.rectangle_bounds((h, w), region_size)
+            inside_rows, inside_cols = (rows >= top) & (rows < bottom), (cols >= left) & (cols < right)
+            if region_type == 'inner':
+                return inside_rows & inside_cols
+            if region_type == 'outer':
+                return ~inside_rows & ~inside_cols
+            raise ValueError(f"Unknown rectangular region type: {region_type}")
+        distance = np.hypot((rows - h // 2).astype(np.float64), (cols - w // 2).astype(np.float64))
+        if isinstance(region_size, list):
+            region_size = tuple(region_size)
+        return self.radial_mask(distance, (h, w), region_type, region_size, dtype)
+
+    @staticmethod
+    def radial_mask(distance, shape, region_type, region_size, dtype):
+        """Mask of a radial region given every bin's distance from the zero-frequency bin."""
+        h, w = shape[:2]
+        # Percentages are diameters relative to the shorter side, so radii are half of that
+        scale = min(h, w) / 200.0
+        if region_type == 'circle':
+            return distance <= region_size * scale
+        if region_type == 'annulus':
+            inner, outer = region_size
+            return (distance >= inner * scale) & (distance <= outer * scale)
+        if region_type == 'gaussian':
+            sigma = max(region_size * scale, np.finfo(np.float64).eps)
+            return np.exp(-0.5 * (distance / sigma) ** 2).astype(dtype, copy=False)
+        raise ValueError(f"Unknown region type: {region_type}")
+
+    def apply(self, spectrum, shape, region_type, region_size, content_shape=None):
+        """Apply a region to a full shifted spectrum (or (N, h, w) stack) in place."""
+        if region_type in self.RECTANGULAR:
+            for index in self.rectangle_slices(shape, region_type, region_size, content_shape):
+                spectrum[index] = 0
+        else:
+            # Float masks match the spectrum's precision so the multiply never upcasts
+            spectrum *= self.mask(shape, region_type, region_size, dtype=spectrum.real.dtype, content_shape=content_shape)
+        return spectrum
+
+
+# Shared by every engine and processor
+region_masks = RegionMasks()
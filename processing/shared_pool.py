@@ -0,0 +1,159 @@
+# processing/shared_pool.py
+"""Zero-copy process-pool mixing over multiprocessing.shared_memory.
+
+Inputs, per-worker partial results and the final image live in shared memory
+blocks; workers receive (name, shape, dtype) descriptors, never pickled arrays.
+Mixing is linear, so each worker mixes a group of inputs all the way to a
+spatial partial (forward FFTs, weighting, mask, inverse FFT) and the parent
+only sums the partials into the shared uint8 output.
+"""
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+_released = []  # Blocks whose arrays were collected, closed on the next allocation
+_released_lock = threading.Lock()
+_worker_cores = {}  # (engine, precision, pad mode) -> MixingCore, one set per worker process
+
+
+def _sweep_released():
+    with _released_lock:
+        for block in list(_released):
+            try:
+                block.close()
+            except BufferError:
+                continue  # Still exported by a view; retry on the next sweep
+            _released.remove(block)
+
+
+def _release_later(block):
+    with _released_lock:
+        _released.append(block)
+
+
+def create_shared(shape, dtype):
+    """Allocate an ndarray in a new shared memory block; returns (array, descriptor, block)."""
+    _sweep_released()
+    dtype = np.dtype(dtype)
+    size = max(1, int(np.prod(shape)) * dtype.itemsize)
+    block = shared_memory.SharedMemory(create=True, size=size)
+    array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return array, (block.name, tuple(shape), dtype.str), block
+
+
+def attach_shared(descriptor):
+    """Map a block created in another process; returns (array, block)."""
+    name, shape, dtype = descriptor
+    # Pool workers share the parent's resource tracker, so attaching never takes ownership;
+    # the creating process alone unlinks the block
+    block = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf), block
+
+
+def adopt_shared(array, block):
+    """Unlink a block now and close it once array is garbage collected.
+
+    The mapping stays valid in this process, so array can be handed to the GUI
+    (or wrapped as a QImage) without copying.
+    """
+    block.unlink()
+    weakref.finalize(array, _release_later, block)
+    return array
+
+
+def _mix_group(engine, precision, pad_mode, descriptors, weights, target_shape, region_type, region_size, partials,
+               slot):
+    """Worker: mix a group of shared inputs into partial slot of the shared partials block."""
+    from .mixing_core import MixingCore, RealMixingCore
+    from .mixing_kernel import accumulate_spectra
+    core = _worker_cores.get((engine, precision, pad_mode))
+    if core is None:
+        core = (RealMixingCore if engine == "half" else MixingCore)(precision=precision, pad_mode=pad_mode)
+        _worker_cores[(engine, precision, pad_mode)] = core
+    attached = [attach_shared(descriptor) for descriptor in descriptors]
+    arrays = [array for array, _ in attached]
+    blocks = [block for _, block in attached]
+    del attached
+    partial_array, partial_block = attach_shared(partials)
+    try:
+        spectra = core.get_spectra(arrays, target_shape)
+        mixed_ft = accumulate_spectra(spectra, weights)
+        core.mask_spectrum(mixed_ft, target_shape, region_type, region_size)
+        partial_array[slot] = core.inverse_fft(mixed_ft, target_shape)
+    finally:
+        # Every view must be gone before its block can be closed
+        del arrays, partial_array
+        partial_block.close()
+        for block in blocks:
+            block.close()
+
+
+class SharedMemoryMixer:
+    """Process pool that mixes inputs held in shared memory."""
+
+    def __init__(self, processes=None, engine="full", precision="double", pad_mode=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.engine = engine
+        self.precision = precision
+        self.pad_mode = pad_mode
+        self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn keeps workers independent of the parent's Qt and worker threads
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+        return self._executor
+
+    def mix(self, images, weights, region_type, region_size, target_shape, cancelled=None):
+        """Mix images and return the uint8 result backed by shared memory, or None if cancelled."""
+        blocks = []
+        try:
+            descriptors = []
+            for image in images:
+                shared, descriptor, block = create_shared(image.shape, image.dtype)
+                shared[...] = image
+                del shared
+                descriptors.append(descriptor)
+                blocks.append(block)
+            groups = min(self.processes, len(images))
+            h, w = target_shape[:2]
+            dtype = np.float32 if self.precision == "single" else np.float64
+            partials, partials_descriptor, partials_block = create_shared((groups, h, w), dtype)
+            blocks.append(partials_block)
+
+            futures = []
+            for slot in range(groups):
+                members = range(slot, len(images), groups)
+                futures.append(self._pool().submit(
+                    _mix_group, self.engine, self.precision, self.pad_mode,
+                    [descriptors[i] for i in members], [weights[i] for i in members],
+                    (h, w), region_type, region_size, partials_descriptor, slot))
+            for future in futures:
+                future.result()
+            if cancelled is not None and cancelled():
+                del partials
+                return None
+
+            output, _, output_block = create_shared((h, w), np.uint8)
+            mixed = partials.sum(axis=0)
+            del partials
+            np.clip(mixed, 0, 255, out=mixed)
+            output[...] = mixed  # Cast into the shared output, no intermediate uint8 copy
+            return adopt_shared(output, output_block)
+        finally:
+            for block in blocks:
+                try:
+                    block.close()
+                except BufferError:
+                    _release_later(block)
+                block.unlink()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,84 @@
+# processing/spectrum_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class SpectrumCache:
+    """In-process LRU cache of shifted spectra keyed by image content and target shape."""
+
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image, target_shape=None, kind="full"):
+        """Build a cache key from the image content hash, the target shape and the spectrum kind.
+
+        Images that already know their hash (StoredImage) are not read at all.
+        """
+        if target_shape is None:
+            target_shape = image.shape
+        content_digest = getattr(image, "content_digest", None)
+        if content_digest is None:
+            image = np.ascontiguousarray(image)
+            digest = hashlib.blake2b(image, digest_size=16)
+            digest.update(str((image.shape, image.dtype.str)).encode())
+            content_digest = digest.hexdigest()
+        return content_digest, tuple(target_shape[:2]), kind
+
+    def get(self, key):
+        """Return the cached spectrum for key (marking it recently used) or None."""
+        with self._lock:
+            spectrum = self._entries.get(key)
+            if spectrum is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return spectrum
+
+    def put(self, key, spectrum):
+        """Store a spectrum, evicting least recently used entries to stay within budget."""
+        if spectrum.nbytes > self.max_bytes:
+            return spectrum
+        # Cached spectra are shared between callers, so nobody may modify them in place
+        spectrum.flags.writeable = False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.nbytes
+            self._entries[key] = spectrum
+            self.current_bytes += spectrum.nbytes
+            self._evict()
+        return spectrum
+
+    def set_max_bytes(self, max_bytes):
+        """Change the memory budget, evicting entries if the cache is now too large."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        while self._entries and self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
+
+
+# Shared by ImageProcessor and the component viewers
+spectrum_cache = SpectrumCache()
+# Resized (and padded) inputs, so spectra evicted or rebuilt at another precision skip the resize
+resize_cache = SpectrumCache(max_bytes=128 * 1024 * 1024)
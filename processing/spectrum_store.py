@@ -0,0 +1,156 @@
+# processing/spectrum_store.py
+"""Persistent on-disk spectrum store shared by sessions and worker processes.
+
+Spectra are saved as .npy files named after their spectrum cache key
+(content hash, target shape, engine kind/precision/padding) and reloaded
+memory-mapped, so a known input costs a file map instead of a forward FFT.
+Files are written to a temporary name and renamed into place, which makes
+concurrent writers of the same key harmless and never exposes a partial
+file to readers. Loading a file bumps its modification time; once the
+directory exceeds max_bytes the least recently used files are deleted
+(mapped files stay readable in the processes that still map them).
+
+Image files are additionally aliased by the hash of their bytes to the
+hash, shape and dtype of their decoded pixels, so open_image() can hand
+out a StoredImage that is only decoded if a spectrum is actually missing.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import cv2
+import numpy as np
+from .spectrum_cache import SpectrumCache
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024 * 1024
+
+
+class StoredImage:
+    """Decoded-on-demand grayscale image whose pixel hash and shape are already known."""
+
+    def __init__(self, path, content_digest, shape, dtype):
+        self.path = path
+        self.content_digest = content_digest
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._pixels = None
+
+    def __array__(self, dtype=None, copy=None):
+        if self._pixels is None:
+            pixels = cv2.imread(self.path, cv2.IMREAD_GRAYSCALE)
+            if pixels is None:
+                raise ValueError(f"Failed to load image: {self.path}")
+            self._pixels = pixels
+        return self._pixels if dtype is None else self._pixels.astype(dtype)
+
+
+class SpectrumStore:
+    """Size-bounded directory of memory-mapped spectra."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_environment(cls):
+        """Store configured by IMAGE_MIXER_SPECTRUM_STORE (directory) and _BYTES, or None."""
+        directory = os.environ.get("IMAGE_MIXER_SPECTRUM_STORE")
+        if not directory:
+            return None
+        return cls(directory, int(os.environ.get("IMAGE_MIXER_SPECTRUM_STORE_BYTES", DEFAULT_MAX_BYTES)))
+
+    def path(self, key):
+        digest, (h, w), kind = key
+        return os.path.join(self.directory, f"{digest}-{h}x{w}-{kind}.npy")
+
+    def load(self, key):
+        """Return the stored spectrum for key as a read-only memory map, or None."""
+        path = self.path(key)
+        try:
+            spectrum = np.load(path, mmap_mode="r")
+            os.utime(path)  # Least recently used files are evicted first
+            return spectrum
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Discarding unreadable stored spectrum {path}: {e}")
+            self._remove(path)
+            return None
+
+    def save(self, key, spectrum):
+        """Write a spectrum atomically, then evict old files to stay within max_bytes."""
+        if spectrum.nbytes > self.max_bytes:
+            return
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as spectrum_file:
+                np.save(spectrum_file, spectrum)
+            os.replace(temporary, self.path(key))
+        except OSError as e:
+            print(f"Error storing spectrum: {e}")
+            self._remove(temporary)
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used spectra until the directory fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npy"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another process meanwhile
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith((".npy", ".json")):
+                self._remove(entry.path)
+
+    @staticmethod
+    def file_digest(path, chunk_size=16 * 1024 * 1024):
+        """Hash of a file's bytes, cheaper than decoding it."""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as image_file:
+            for chunk in iter(lambda: image_file.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def open_image(self, path):
+        """Return a StoredImage for a file seen before, otherwise decode it and remember its pixel hash."""
+        file_digest = self.file_digest(path)
+        alias_path = os.path.join(self.directory, f"{file_digest}.json")
+        try:
+            with open(alias_path) as alias_file:
+                alias = json.load(alias_file)
+            return StoredImage(path, alias["digest"], alias["shape"], alias["dtype"])
+        except (OSError, ValueError, KeyError):
+            pass
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"Failed to load image: {path}")
+        digest = SpectrumCache.make_key(image)[0]
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "w") as alias_file:
+            json.dump({"digest": digest, "shape": image.shape, "dtype": image.dtype.str}, alias_file)
+        os.replace(temporary, alias_path)
+        return image
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Already gone, or still open on platforms that forbid deleting it
+
+
+# Used by every engine unless one is passed explicitly; None when IMAGE_MIXER_SPECTRUM_STORE is unset
+spectrum_store = SpectrumStore.from_environment()
@@ -0,0 +1,6 @@
+# replay_session.py
+import sys
+from gui.session import main
+
+if __name__ == "__main__":
+    sys.exit(main())